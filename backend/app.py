@@ -8,40 +8,81 @@ Points d'entrée :
     GET  /                      → Bienvenue / info API
     GET  /health                → Vérification état de l'API
     GET  /vms                   → Liste de toutes les VMs
+    GET  /vms.ndjson            → Liste des VMs en flux NDJSON
     GET  /vm/<name>             → Détails d'une VM
     GET  /vm/<name>/metrics     → Métriques temps réel d'une VM
     POST /vm/<name>/start       → Démarrer une VM
     POST /vm/<name>/stop        → Arrêter une VM
     POST /vm/<name>/restart     → Redémarrer une VM
     GET  /stats/summary         → Stats globales de l'hyperviseur
+    GET  /jobs/<id>             → Suivi d'une tâche de fond (?async=1)
 
 WebSocket (via flask-socketio) :
     Event "request_metrics"     → Envoie les métriques d'une VM
-    Event "request_all_metrics" → Envoie les métriques de toutes les VMs
+    Event "request_all_metrics" → Abonne à la diffusion des métriques de toutes les VMs
 """
 
-import logging
 import os
+
+# ──── Mode asynchrone (optionnel) ─────────────
+# ASYNC_MODE=eventlet : ordonnancement coopératif, des milliers de sockets
+# par worker sur un seul thread OS. monkey_patch() doit impérativement
+# précéder tout autre import (flask, sqlite3, libvirt_manager…).
+ASYNC_MODE = os.environ.get("ASYNC_MODE", "threading")
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
+import hashlib
+import dataclasses
+import fcntl
+import itertools
+import json
+import logging
+import re
+import shutil
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
 
 # ──── Import optionnel de flask-socketio ──────
 try:
-    from flask_socketio import SocketIO, emit
+    from flask_socketio import SocketIO, emit, join_room
     HAS_SOCKETIO = True
 except ImportError:
     HAS_SOCKETIO = False
 
+# ──── Import optionnel d'orjson ───────────────
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# ──── Import optionnel d'asgiref (frontal ASGI) ──
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    HAS_ASGIREF = True
+except ImportError:
+    HAS_ASGIREF = False
+
 from libvirt_manager import (
+    JobNotFoundError,
+    JobQueueFullError,
     LibvirtManager,
     LibvirtConnectionError,
     LibvirtError,
+    LibvirtTimeoutError,
+    VMInfo,
     VMNotFoundError,
 )
 
@@ -63,33 +104,124 @@ logger = logging.getLogger("kvm-supervisor")
 # ──────────────────────────────────────────────
 app = Flask(__name__)
 
+# ──── Profilage (optionnel, FLASK_PROFILE=1) ──
+# Un fichier .prof par requête dans profiler_results/ (à ouvrir avec
+# SnakeViz ou Tuna). Aucun surcoût lorsque le flag est absent.
+if os.environ.get("FLASK_PROFILE") == "1":
+    from werkzeug.middleware.profiler import ProfilerMiddleware
+    os.makedirs("profiler_results", exist_ok=True)
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profile_dir="profiler_results", restrictions=[30])
+
+# ──── Sérialisation JSON (orjson si disponible) ──
+if HAS_ORJSON:
+    def _orjson_dumps(obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Fournisseur JSON Flask basé sur orjson (encodeur C)."""
+
+        def dumps(self, obj, **kwargs) -> str:
+            return _orjson_dumps(obj)
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    class OrjsonModule:
+        """Module JSON minimal (dumps/loads) attendu par python-socketio."""
+        dumps = staticmethod(_orjson_dumps)
+        loads = staticmethod(orjson.loads)
+
+    app.json = OrjsonProvider(app)
+
+
+def _json_default(obj):
+    """Repli du module json : les dataclasses (VMInfo) sont converties en dict."""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdJsonModule:
+    """Module json standard, complété pour les dataclasses (python-socketio)."""
+    loads = staticmethod(json.loads)
+
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        return json.dumps(obj, default=_json_default, **kwargs)
+
+
+def json_dumpb(obj) -> bytes:
+    """Sérialise `obj` en JSON (bytes), via orjson si disponible."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default).encode()
+
 # Configuration JWT
 from datetime import timedelta
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret-key-change-me")
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=7)
+app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=30)
 jwt = JWTManager(app)
 
-# ── Base de donnéesAuth (SQLite) ──────────────
-DB_NAME = "kvm_auth.db"
+# ── Base de donnéesAuth (SQLite en mémoire) ───
+# La source de vérité est USERS_FILE (JSON, réécrit de façon atomique) ;
+# SQLite ne vit qu'en mémoire : aucune E/S disque ni fichier WAL au login.
+USERS_FILE = os.environ.get("USERS_FILE", "users.json")
+LEGACY_DB_NAME = "kvm_auth.db"
+DB_NAME = "file:auth?mode=memory&cache=shared"
+
+# Connexion partagée par tout le processus (elle maintient aussi la base
+# mémoire en vie : celle-ci disparaît à la fermeture de la dernière connexion).
+_AUTH_DB = sqlite3.connect(DB_NAME, uri=True, check_same_thread=False, isolation_level=None)
+_AUTH_LOCK = threading.Lock()
+
+
+def _read_users_file() -> dict[str, str]:
+    """Lit USERS_FILE, ou à défaut l'ancienne base fichier kvm_auth.db."""
+    if os.path.exists(USERS_FILE):
+        with open(USERS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    if os.path.exists(LEGACY_DB_NAME):
+        legacy = sqlite3.connect(LEGACY_DB_NAME)
+        try:
+            rows = legacy.execute("SELECT username, password_hash FROM users").fetchall()
+        finally:
+            legacy.close()
+        logger.info("INIT: %d utilisateur(s) importé(s) depuis %s", len(rows), LEGACY_DB_NAME)
+        return dict(rows)
+    return {}
+
+
+def save_users():
+    """Écrit la table users dans USERS_FILE de façon atomique (fichier temporaire + rename)."""
+    with _AUTH_LOCK:
+        rows = _AUTH_DB.execute("SELECT username, password_hash FROM users").fetchall()
+    tmp = USERS_FILE + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(dict(rows), f, indent=2)
+    os.replace(tmp, USERS_FILE)
+
 
 def init_db():
     """Initialise la base de données utilisateurs."""
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS users
-                     (username TEXT PRIMARY KEY, password_hash TEXT)''')
-        
-        # Vérifier si admin existe
-        c.execute("SELECT * FROM users WHERE username='admin'")
-        if not c.fetchone():
-            # Mot de passe par défaut : admin
-            p_hash = generate_password_hash("admin")
-            c.execute("INSERT INTO users VALUES ('admin', ?)", (p_hash,))
-            logger.info("INIT: Utilisateur 'admin' créé (mdp: 'admin')")
-        
-        conn.commit()
-        conn.close()
+        users = _read_users_file()
+        dirty = not os.path.exists(USERS_FILE)
+        with _AUTH_LOCK:
+            _AUTH_DB.execute('''CREATE TABLE IF NOT EXISTS users
+                                (username TEXT PRIMARY KEY, password_hash TEXT)''')
+            _AUTH_DB.executemany("INSERT OR REPLACE INTO users VALUES (?, ?)", users.items())
+
+            # Vérifier si admin existe
+            if "admin" not in users:
+                # Mot de passe par défaut : admin
+                p_hash = generate_password_hash("admin")
+                _AUTH_DB.execute("INSERT OR REPLACE INTO users VALUES ('admin', ?)", (p_hash,))
+                logger.info("INIT: Utilisateur 'admin' créé (mdp: 'admin')")
+                dirty = True
+        if dirty:
+            save_users()
     except Exception as e:
         logger.error("Erreur initialisation DB auth : %s", e)
 
@@ -98,17 +230,124 @@ try:
 except Exception as e:
     logger.warning("Impossible d'initialiser la DB Auth : %s", e)
 
+# Table users chargée en mémoire (admin seul en pratique) : /login ne
+# fait plus de requête SQL. Toute mutation future des utilisateurs doit
+# appeler load_users() pour rafraîchir ce cache.
+_USERS: dict[str, str] = {}
+
+# Derniers couples (username, sha256(mdp)) vérifiés avec succès → hash
+# contre lequel ils ont été validés. Évite de refaire le PBKDF2 (coûteux
+# par conception) pour des logins répétés depuis le même client.
+_VERIFIED_MAX = 256
+_VERIFIED: OrderedDict[tuple[str, str], str] = OrderedDict()
+_VERIFIED_LOCK = threading.Lock()
+
+
+def load_users():
+    """(Re)charge la table users en mémoire et vide le cache de vérification."""
+    global _USERS
+    with _AUTH_LOCK:
+        rows = _AUTH_DB.execute("SELECT username, password_hash FROM users").fetchall()
+    _USERS = dict(rows)
+    with _VERIFIED_LOCK:
+        _VERIFIED.clear()
+
+
+def check_credentials(username: str, password: str) -> bool:
+    """Vérifie un couple identifiant / mot de passe contre le cache mémoire."""
+    p_hash = _USERS.get(username)
+    if not p_hash:
+        return False
+
+    key = (username, hashlib.sha256(password.encode()).hexdigest())
+    with _VERIFIED_LOCK:
+        if _VERIFIED.get(key) == p_hash:
+            _VERIFIED.move_to_end(key)
+            return True
+
+    if not check_password_hash(p_hash, password):
+        return False
+
+    with _VERIFIED_LOCK:
+        _VERIFIED[key] = p_hash
+        if len(_VERIFIED) > _VERIFIED_MAX:
+            _VERIFIED.popitem(last=False)
+    return True
+
+
+try:
+    load_users()
+except Exception as e:
+    logger.warning("Impossible de charger les utilisateurs : %s", e)
+
 # CORS : autorise toutes les origines (nécessaire pour Flutter mobile)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # URI libvirt configurable via variable d'environnement
 LIBVIRT_URI = os.environ.get("LIBVIRT_URI", "qemu:///system")
-manager = LibvirtManager(uri=LIBVIRT_URI)
+LIBVIRT_POOL_SIZE = int(os.environ.get("LIBVIRT_POOL_SIZE", "4"))
+LIBVIRT_TIMEOUT = float(os.environ.get("LIBVIRT_TIMEOUT", "5.0"))
+manager = LibvirtManager(uri=LIBVIRT_URI, pool_size=LIBVIRT_POOL_SIZE, rpc_timeout=LIBVIRT_TIMEOUT)
+manager.start_cpu_sampler(float(os.environ.get("CPU_SAMPLE_INTERVAL", "2.0")))
+if ASYNC_MODE == "eventlet":
+    # Les appels libvirt bloquent dans le code C sans rendre la main au hub
+    # eventlet : on les exécute dans le pool de threads natifs (tpool). Le
+    # gestionnaire n'utilise que des verrous, files et exécuteurs natifs.
+    from eventlet import tpool
+    manager = tpool.Proxy(manager)
+
+# ──── Tâches de fond : processus unique ───────
+# Le registre des tâches (?async=1) vit dans la mémoire du processus : avec
+# plusieurs workers (gunicorn -w N, uvicorn --workers N), /jobs/<id> serait
+# servi au hasard par un processus qui ignore la tâche. Chaque processus
+# tient un verrou POSIX partagé sur JOBS_LOCK_FILE ; le passer en exclusif
+# sans attendre n'aboutit que si aucun autre processus ne le tient.
+JOBS_LOCK_FILE = os.environ.get(
+    "JOBS_LOCK_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs.lock")
+)
+_JOBS_LOCK_GUARD = threading.Lock()
+_jobs_lock_fd = -1
+_jobs_lock_pid = 0
+
+
+class AsyncJobsUnavailableError(Exception):
+    """Levée pour ?async=1 ou /jobs/<id> quand plusieurs processus servent l'API."""
+
+
+def _single_process() -> bool:
+    """Vrai si ce processus est le seul à servir l'application."""
+    global _jobs_lock_fd, _jobs_lock_pid
+    with _JOBS_LOCK_GUARD:
+        try:
+            # Les verrous POSIX ne passent pas au fils d'un fork : on les reprend
+            if _jobs_lock_pid != os.getpid():
+                _jobs_lock_fd = os.open(JOBS_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.lockf(_jobs_lock_fd, fcntl.LOCK_SH)
+                _jobs_lock_pid = os.getpid()
+        except OSError as e:
+            logger.warning("Verrou %s indisponible (%s) : processus unique supposé", JOBS_LOCK_FILE, e)
+            return True
+        try:
+            # Un échec laisse intact le verrou partagé déjà tenu
+            fcntl.lockf(_jobs_lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        fcntl.lockf(_jobs_lock_fd, fcntl.LOCK_SH)
+        return True
+
+
+# Dès l'import : un worker qui n'a encore reçu aucune tâche compte aussi
+_single_process()
 
 # ──── WebSocket (optionnel) ───────────────────
 if HAS_SOCKETIO:
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
-    logger.info("Flask-SocketIO activé — WebSocket disponible")
+    socketio = SocketIO(
+        app,
+        cors_allowed_origins="*",
+        async_mode=ASYNC_MODE,
+        json=OrjsonModule if HAS_ORJSON else StdJsonModule,
+    )
+    logger.info("Flask-SocketIO activé (%s) — WebSocket disponible", ASYNC_MODE)
 else:
     socketio = None
     logger.warning(
@@ -116,10 +355,105 @@ else:
         "Installez-le avec : pip install flask-socketio"
     )
 
+# ──── Cache TTL devant libvirt ───────────────
+# Plusieurs clients (REST ou WebSocket) qui interrogent la même ressource
+# dans la fenêtre TTL partagent un seul appel libvirt.
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "1.0"))
+_TTL_CACHE: dict[str, tuple[float, object]] = {}
+# Un verrou par clé, retiré avec l'entrée : seules les clés dont le calcul
+# a abouti (VMs existantes) en gardent un, un nom de VM arbitraire venu de
+# l'URL n'en laisse aucun derrière lui.
+_TTL_LOCKS: dict[str, threading.Lock] = {}
+_TTL_LOCKS_GUARD = threading.Lock()
+# Génération du cache, avancée par chaque invalidation : un calcul lancé
+# avant une action ne publie pas son résultat (antérieur) après elle.
+_TTL_GEN = 0
+
+
+def _cached(key: str, fn, *args):
+    """Retourne fn(*args), mis en cache CACHE_TTL secondes sous la clé `key`."""
+    hit = _TTL_CACHE.get(key)
+    if hit is not None and time.monotonic() - hit[0] < CACHE_TTL:
+        return hit[1]
+
+    with _TTL_LOCKS_GUARD:
+        lock = _TTL_LOCKS.setdefault(key, threading.Lock())
+
+    # Un seul appel libvirt par clé : les requêtes concurrentes attendent
+    # le résultat de la première plutôt que de le recalculer.
+    with lock:
+        hit = _TTL_CACHE.get(key)
+        if hit is not None and time.monotonic() - hit[0] < CACHE_TTL:
+            return hit[1]
+        gen = _TTL_GEN
+        try:
+            value = fn(*args)
+        except BaseException:
+            # Rien à mettre en cache (ex. VM introuvable) : le verrou non plus
+            with _TTL_LOCKS_GUARD:
+                if _TTL_LOCKS.get(key) is lock:
+                    del _TTL_LOCKS[key]
+            raise
+        if gen == _TTL_GEN:
+            _TTL_CACHE[key] = (time.monotonic(), value)
+        return value
+
+
+def _invalidate_cache():
+    """
+    Vide le cache TTL (à appeler après toute action modifiant une VM).
+    Sans verrou : appelable depuis n'importe quel thread, y compris les
+    threads natifs des tâches de fond. Les verrous par clé sont conservés :
+    un calcul en cours garde l'exclusivité de sa clé.
+    """
+    global _TTL_GEN
+    _TTL_GEN += 1
+    _TTL_CACHE.clear()
+
+
+def _cached_list_vms() -> list[VMInfo]:
+    return _cached("vms", manager.list_vms)
+
+
+def _cached_vm_metrics(name: str) -> dict:
+    return _cached(f"metrics:{name}", manager.vm_metrics, name)
+
+
+def _cached_all_vm_metrics() -> list[dict]:
+    return _cached("all_metrics", manager.all_vm_metrics)
+
+# ──── État libvirt échantillonné (pour /health) ──
+# Un thread sonde libvirt toutes les HEALTH_INTERVAL secondes : les sondes
+# de liveness ne déclenchent plus de handshake libvirt.
+HEALTH_INTERVAL = float(os.environ.get("HEALTH_INTERVAL", "5.0"))
+# (connecté, message, horodatage monotonic) — tuple remplacé atomiquement
+_LIBVIRT_STATUS: tuple[bool, str, float] = (True, "Connecté", 0.0)
+
+
+def _probe_libvirt():
+    """Teste la connexion libvirt et met à jour _LIBVIRT_STATUS."""
+    global _LIBVIRT_STATUS
+    try:
+        manager.ping()
+        _LIBVIRT_STATUS = (True, "Connecté", time.monotonic())
+    except LibvirtConnectionError as e:
+        _LIBVIRT_STATUS = (False, str(e), time.monotonic())
+
+
+def _libvirt_health_loop():
+    while True:
+        _probe_libvirt()
+        time.sleep(HEALTH_INTERVAL)
+
+
+threading.Thread(target=_libvirt_health_loop, name="libvirt-health", daemon=True).start()
+
 # ──────────────────────────────────────────────
 # Date de démarrage (pour /health)
 # ──────────────────────────────────────────────
 START_TIME = datetime.now(timezone.utc)
+# Horloge monotone pour l'uptime : insensible aux réglages de l'horloge (NTP, etc.)
+_START_MONOTONIC = time.monotonic()
 
 
 # ==============================================================
@@ -136,6 +470,34 @@ def handle_vm_not_found(error):
     }), 404
 
 
+@app.errorhandler(JobNotFoundError)
+def handle_job_not_found(error):
+    """Retourne 404 lorsque la tâche demandée est inconnue (ou trop ancienne)."""
+    return jsonify({
+        "error": "job_not_found",
+        "message": str(error),
+    }), 404
+
+
+@app.errorhandler(JobQueueFullError)
+def handle_job_queue_full(error):
+    """Retourne 429 lorsque trop de tâches de fond sont déjà en cours."""
+    logger.warning("Tâche refusée : %s", error)
+    return jsonify({
+        "error": "too_many_jobs",
+        "message": str(error),
+    }), 429
+
+
+@app.errorhandler(AsyncJobsUnavailableError)
+def handle_async_jobs_unavailable(error):
+    """Retourne 501 lorsque les tâches de fond sont désactivées (plusieurs workers)."""
+    return jsonify({
+        "error": "async_unavailable",
+        "message": str(error),
+    }), 501
+
+
 @app.errorhandler(LibvirtConnectionError)
 def handle_libvirt_connection(error):
     """Retourne 503 lorsque la connexion à libvirt échoue."""
@@ -146,6 +508,16 @@ def handle_libvirt_connection(error):
     }), 503
 
 
+@app.errorhandler(LibvirtTimeoutError)
+def handle_libvirt_timeout(error):
+    """Retourne 504 lorsqu'un appel libvirt ne répond pas à temps."""
+    logger.error("Délai libvirt dépassé : %s", error)
+    return jsonify({
+        "error": "libvirt_timeout",
+        "message": str(error),
+    }), 504
+
+
 @app.errorhandler(LibvirtError)
 def handle_libvirt_error(error):
     """Retourne 500 pour les erreurs libvirt génériques."""
@@ -175,6 +547,52 @@ def handle_internal(error):
     }), 500
 
 
+# ==============================================================
+#  HELPERS REQUÊTE
+# ==============================================================
+
+def _json_body(cache: bool = True) -> dict:
+    """
+    Retourne le corps JSON de la requête, ou {} s'il est absent ou invalide.
+    Un corps vide (Content-Length nul) n'est pas parsé du tout.
+    """
+    if not request.content_length:
+        return {}
+    body = request.get_json(silent=True, cache=cache)
+    return body if isinstance(body, dict) else {}
+
+
+# Caractères hors de la production Char d'XML 1.0 (contrôles, substituts,
+# U+FFFE/U+FFFF) : lxml les refuse, ElementTree produirait un XML invalide
+_XML_INVALID_CHARS = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def _is_xml_text(value) -> bool:
+    """Vrai si `value` est une chaîne utilisable telle quelle comme texte XML."""
+    return isinstance(value, str) and not _XML_INVALID_CHARS.search(value)
+
+
+def _encode_with_etag(producer) -> tuple[str, bytes]:
+    body = producer()
+    return hashlib.blake2b(body, digest_size=8).hexdigest(), body
+
+
+def _etag_response(key: str, producer):
+    """
+    Réponse JSON munie d'un ETag ; 304 sans corps si le client (If-None-Match)
+    possède déjà cette version. `producer` retourne le corps JSON encodé.
+    Le couple (etag, corps) est mis en cache CACHE_TTL secondes sous `key`
+    pour que les sondages concurrents le partagent.
+    """
+    etag, body = _cached(key, _encode_with_etag, producer)
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
+
+
 # ==============================================================
 #  ROUTES AUTH
 # ==============================================================
@@ -182,102 +600,149 @@ def handle_internal(error):
 @app.route("/login", methods=["POST"])
 def login():
     """Authentification utilisateur."""
-    username = request.json.get("username", None)
-    password = request.json.get("password", None)
+    if not request.is_json:
+        return jsonify({"msg": "Content-Type application/json attendu"}), 415
+    # cache=False : le dict parsé ne sert qu'ici, inutile de le garder sur la requête
+    body = _json_body(cache=False)
+    username = body.get("username", None)
+    password = body.get("password", None)
     
     if not username or not password:
         return jsonify({"msg": "Missing username or password"}), 400
     
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT password_hash FROM users WHERE username=?", (username,))
-    row = c.fetchone()
-    conn.close()
-    
-    if row and check_password_hash(row[0], password):
+    if check_credentials(username, password):
         access_token = create_access_token(identity=username)
-        return jsonify(access_token=access_token)
+        refresh_token = create_refresh_token(identity=username)
+        return jsonify(access_token=access_token, refresh_token=refresh_token)
     
     return jsonify({"msg": "Identifiants invalides"}), 401
 
 
+@app.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Émet un nouveau token d'accès à partir du refresh token
+    (header Authorization: Bearer <refresh_token>), sans revérifier le
+    mot de passe : le PBKDF2 n'est payé qu'au premier login.
+    """
+    username = get_jwt_identity()
+    if username not in _USERS:
+        return jsonify({"msg": "Utilisateur inconnu"}), 401
+    return jsonify(access_token=create_access_token(identity=username))
+
+
 # ==============================================================
 #  ROUTES API (Protégées)
 # ==============================================================
 
+# Toutes les routes VM passent par ce blueprint : le JWT est vérifié une
+# seule fois, dans un before_request commun, au lieu d'un décorateur par route.
+api = Blueprint("vms", __name__)
+
+
+@api.before_request
+def _require_jwt():
+    verify_jwt_in_request()
+
+
 # ── Racine ────────────────────────────────────
+# Corps JSON constant, sérialisé une seule fois au démarrage.
+_INDEX_BODY = json.dumps({
+    "name": "KVM Supervisor API",
+    "version": "1.0.0",
+    "description": "API REST pour la supervision d'hyperviseur KVM via libvirt",
+    "endpoints": {
+        "GET /":                  "Bienvenue / info",
+        "GET /health":            "État de l'API",
+        "GET /vms":               "Liste des VMs",
+        "GET /vm/<name>":         "Détails d'une VM",
+        "GET /vm/<name>/metrics": "Métriques temps réel",
+        "POST /vm/<name>/start":  "Démarrer une VM",
+        "POST /vm/<name>/stop":   "Arrêter une VM",
+        "POST /vm/<name>/restart":"Redémarrer une VM",
+        "GET /stats/summary":     "Statistiques globales",
+    },
+}).encode()
+
+
 @app.route("/", methods=["GET"])
 def index():
     """Point d'entrée : présentation de l'API."""
-    return jsonify({
-        "name": "KVM Supervisor API",
-        "version": "1.0.0",
-        "description": "API REST pour la supervision d'hyperviseur KVM via libvirt",
-        "endpoints": {
-            "GET /":                  "Bienvenue / info",
-            "GET /health":            "État de l'API",
-            "GET /vms":               "Liste des VMs",
-            "GET /vm/<name>":         "Détails d'une VM",
-            "GET /vm/<name>/metrics": "Métriques temps réel",
-            "POST /vm/<name>/start":  "Démarrer une VM",
-            "POST /vm/<name>/stop":   "Arrêter une VM",
-            "POST /vm/<name>/restart":"Redémarrer une VM",
-            "GET /stats/summary":     "Statistiques globales",
-        },
-    })
+    return app.response_class(_INDEX_BODY, mimetype="application/json")
 
 
 # ── Health check ──────────────────────────────
-@app.route("/health", methods=["GET"])
-def health():
-    """
-    Vérifie l'état de l'API et de la connexion libvirt.
-    Retourne 200 si tout est OK, 503 si libvirt est inaccessible.
-    """
-    uptime = (datetime.now(timezone.utc) - START_TIME).total_seconds()
+# Partie statique de la réponse /health, calculée une seule fois.
+_HEALTH_STARTED_AT = START_TIME.isoformat()
 
-    # Test rapide de connexion libvirt
-    libvirt_ok = True
-    libvirt_message = "Connecté"
-    try:
-        conn = manager._connect()
-        conn.close()
-    except LibvirtConnectionError as e:
-        libvirt_ok = False
-        libvirt_message = str(e)
+
+def _health_payload() -> tuple[dict, int]:
+    """Corps et code HTTP de /health (partagés avec le frontal ASGI)."""
+    uptime = time.monotonic() - _START_MONOTONIC
+
+    # Dernier état connu, sondé en arrière-plan (aucun appel libvirt ici)
+    libvirt_ok, libvirt_message, checked_at = _LIBVIRT_STATUS
 
     status_code = 200 if libvirt_ok else 503
 
-    return jsonify({
+    return {
         "status": "healthy" if libvirt_ok else "degraded",
         "uptime_seconds": round(uptime, 2),
-        "started_at": START_TIME.isoformat(),
+        "started_at": _HEALTH_STARTED_AT,
         "libvirt": {
             "connected": libvirt_ok,
             "message": libvirt_message,
             "uri": LIBVIRT_URI,
+            "checked_seconds_ago": round(time.monotonic() - checked_at, 2) if checked_at else None,
         },
         "websocket_available": HAS_SOCKETIO,
-    }), status_code
+    }, status_code
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    """
+    Vérifie l'état de l'API et de la connexion libvirt.
+    Retourne 200 si tout est OK, 503 si libvirt est inaccessible.
+    """
+    payload, status_code = _health_payload()
+    return jsonify(payload), status_code
 
 
 # ── Liste des VMs ─────────────────────────────
 # ── Liste des VMs ─────────────────────────────
-@app.route("/vms", methods=["GET"])
-@jwt_required()
+@api.route("/vms", methods=["GET"])
 def list_vms():
     """Retourne la liste de toutes les VMs avec leurs infos de base."""
-    vms = manager.list_vms()
-    return jsonify({
-        "count": len(vms),
-        "vms": vms,
-    })
+    return _etag_response("vms_body", _vms_body)
+
+
+def _vms_body() -> bytes:
+    """Corps JSON de /vms, assemblé VM par VM depuis le même générateur que /vms.ndjson."""
+    parts = [json_dumpb(vm) for vm in manager.iter_vms()]
+    return b'{"count":%d,"vms":[' % len(parts) + b",".join(parts) + b"]}"
+
+
+@api.route("/vms.ndjson", methods=["GET"])
+def list_vms_ndjson():
+    """
+    Liste des VMs en NDJSON (une VM JSON par ligne), envoyée au fil de
+    l'énumération libvirt : mémoire constante côté serveur et premier
+    octet reçu sans attendre la fin du parcours.
+    """
+    vms = manager.iter_vms()
+
+    def generate():
+        for vm in vms:
+            yield json_dumpb(vm) + b"\n"
+
+    return app.response_class(generate(), mimetype="application/x-ndjson")
 
 
 # ── Détails d'une VM ──────────────────────────
 # ── Détails d'une VM ──────────────────────────
-@app.route("/vm/<name>", methods=["GET"])
-@jwt_required()
+@api.route("/vm/<name>", methods=["GET"])
 def vm_details(name: str):
     """Retourne les détails complets d'une VM spécifique."""
     details = manager.vm_details(name)
@@ -286,120 +751,168 @@ def vm_details(name: str):
 
 # ── Métriques temps réel d'une VM ─────────────
 # ── Métriques temps réel d'une VM ─────────────
-@app.route("/vm/<name>/metrics", methods=["GET"])
-@jwt_required()
+@api.route("/vm/<name>/metrics", methods=["GET"])
 def vm_metrics(name: str):
     """
     Retourne les métriques en temps réel d'une VM :
     CPU%, RAM%, I/O disque, I/O réseau.
     """
-    metrics = manager.vm_metrics(name)
+    metrics = _cached_vm_metrics(name)
     return jsonify(metrics)
 
 
 # ── Démarrer une VM ───────────────────────────
 # ── Démarrer une VM ───────────────────────────
-@app.route("/vm/<name>/start", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/start", methods=["POST"])
 def start_vm(name: str):
     """Démarre la VM spécifiée."""
     result = manager.start_vm(name)
+    _invalidate_cache()
     return jsonify(result)
 
 
 # ── Arrêter une VM ────────────────────────────
 # ── Arrêter une VM ────────────────────────────
-@app.route("/vm/<name>/stop", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/stop", methods=["POST"])
 def stop_vm(name: str):
     """
     Arrête la VM spécifiée.
     Paramètre optionnel (JSON body) :
         force (bool) : si true, arrêt brutal (destroy). Défaut : false.
+    Paramètre optionnel (query string) :
+        async=1 : tâche de fond, 202 + identifiant à suivre via /jobs/<id>.
     """
-    body = request.get_json(silent=True) or {}
+    body = _json_body()
     force = body.get("force", False)
+    if _wants_async():
+        return _job_accepted(manager.stop_vm_async(name, force=force, on_done=_invalidate_cache))
     result = manager.stop_vm(name, force=force)
+    _invalidate_cache()
     return jsonify(result)
 
 
 # ── Redémarrer une VM ─────────────────────────
 # ── Redémarrer une VM ─────────────────────────
-@app.route("/vm/<name>/restart", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/restart", methods=["POST"])
 def restart_vm(name: str):
     """
     Redémarre la VM spécifiée.
     Paramètre optionnel (JSON body) :
         force (bool) : si true, reset brutal. Défaut : false.
     """
-    body = request.get_json(silent=True) or {}
+    body = _json_body()
     force = body.get("force", False)
     result = manager.restart_vm(name, force=force)
+    _invalidate_cache()
     return jsonify(result)
 
 
 # ── Stats globales (dashboard) ────────────────
 # ── Stats globales (dashboard) ────────────────
-@app.route("/stats/summary", methods=["GET"])
-@jwt_required()
+@api.route("/stats/summary", methods=["GET"])
 def stats_summary():
     """
     Retourne un résumé global : infos hôte, nombre de VMs,
     répartition par état, etc. Idéal pour un dashboard.
+    Paramètre optionnel (query string) :
+        vms (0|1) : 0 pour n'avoir que les compteurs, sans la liste des VMs.
     """
-    stats = manager.global_stats()
-    return jsonify(stats)
+    if request.args.get("vms") == "0":
+        return _etag_response(
+            "stats_counts_body",
+            lambda: json_dumpb(manager.global_stats(include_vms=False)),
+        )
+    return _etag_response("stats_body", lambda: json_dumpb(manager.global_stats()))
 
 
 # ── SNAPSHOTS ─────────────────────────────────
 
-@app.route("/vm/<name>/snapshots", methods=["GET"])
-@jwt_required()
+@api.route("/vm/<name>/snapshots", methods=["GET"])
 def list_snapshots(name):
     """Liste tous les snapshots d'une VM."""
     snapshots = manager.list_snapshots(name)
     return jsonify(snapshots)
 
 
-@app.route("/vm/<name>/snapshots", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/snapshots", methods=["POST"])
 def create_snapshot(name):
     """Crée un nouveau snapshot."""
-    body = request.get_json(silent=True) or {}
+    body = _json_body()
     snapshot_name = body.get("name")
-    description = body.get("description", "")
+    description = body.get("description")
+    if description is None:
+        description = ""
 
     if not snapshot_name:
         return jsonify({"error": "missing_name", "message": "Le nom du snapshot est requis"}), 400
+    if not (_is_xml_text(snapshot_name) and _is_xml_text(description)):
+        return jsonify({
+            "error": "invalid_params",
+            "message": "name et description doivent être des chaînes sans caractères de contrôle",
+        }), 400
 
     result = manager.create_snapshot(name, snapshot_name, description)
     return jsonify(result), 201
 
 
-@app.route("/vm/<name>/snapshots/<snapshot_name>/revert", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/snapshots/<snapshot_name>/revert", methods=["POST"])
 def revert_snapshot(name, snapshot_name):
-    """Restaure la VM à l'état du snapshot."""
+    """Restaure la VM à l'état du snapshot (?async=1 : tâche de fond)."""
+    if _wants_async():
+        return _job_accepted(manager.revert_snapshot_async(name, snapshot_name, on_done=_invalidate_cache))
     result = manager.revert_snapshot(name, snapshot_name)
+    _invalidate_cache()
     return jsonify(result)
 
 
-@app.route("/vm/<name>/snapshots/<snapshot_name>", methods=["DELETE"])
-@jwt_required()
+@api.route("/vm/<name>/snapshots/<snapshot_name>", methods=["DELETE"])
 def delete_snapshot(name, snapshot_name):
-    """Supprime un snapshot."""
+    """Supprime un snapshot (?async=1 : tâche de fond)."""
+    if _wants_async():
+        return _job_accepted(manager.delete_snapshot_async(name, snapshot_name, on_done=_invalidate_cache))
     result = manager.delete_snapshot(name, snapshot_name)
     return jsonify(result)
 
 
+# ── TÂCHES DE FOND ────────────────────────────
+
+def _require_single_process() -> None:
+    """Refuse les tâches de fond si d'autres processus servent l'application."""
+    if not _single_process():
+        raise AsyncJobsUnavailableError(
+            "Tâches de fond indisponibles : l'API tourne sur plusieurs processus (workers)"
+        )
+
+
+def _wants_async() -> bool:
+    """Vrai si le client demande une exécution en tâche de fond (?async=1)."""
+    if request.args.get("async") != "1":
+        return False
+    _require_single_process()
+    return True
+
+
+def _job_accepted(job_id: str):
+    """Réponse 202 pointant vers le suivi de la tâche."""
+    resp = jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+    resp.status_code = 202
+    resp.headers["Location"] = f"/jobs/{job_id}"
+    return resp
+
+
+@api.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """État d'une tâche de fond (pending, running, done, failed) et son résultat."""
+    _require_single_process()
+    return jsonify(manager.job_status(job_id))
+
+
 # ── RESSOURCES ────────────────────────────────
 
-@app.route("/vm/<name>/resources", methods=["POST"])
-@jwt_required()
+@api.route("/vm/<name>/resources", methods=["POST"])
 def update_resources(name):
     """Met à jour les ressources (vCPUs, RAM) de la VM."""
-    body = request.get_json(silent=True) or {}
+    body = _json_body()
     vcpus = body.get("vcpus")
     memory_mb = body.get("memory_mb")
 
@@ -408,80 +921,204 @@ def update_resources(name):
 
     try:
         result = manager.update_resources(name, int(vcpus), int(memory_mb))
+        _invalidate_cache()
         return jsonify(result)
     except ValueError:
         return jsonify({"error": "invalid_params", "message": "vcpus et memory_mb doivent être des entiers"}), 400
 
 
+app.register_blueprint(api)
+
+
 # ==============================================================
 #  WEBSOCKET EVENTS (optionnel)
 # ==============================================================
 
 if HAS_SOCKETIO and socketio is not None:
 
+    # Journalisation échantillonnée des (dé)connexions : lors de tempêtes de
+    # reconnexion, un log par client coûterait formatage + écriture à chaque fois.
+    WS_LOG_SAMPLE = int(os.environ.get("WS_LOG_SAMPLE", "1000"))
+    _ws_connects = itertools.count()
+    _ws_disconnects = itertools.count()
+
     @socketio.on("connect")
     def ws_connect():
         """Client WebSocket connecté."""
-        logger.info("Client WebSocket connecté")
+        n = next(_ws_connects)
+        if n % WS_LOG_SAMPLE == 0 and logger.isEnabledFor(logging.INFO):
+            logger.info("Client WebSocket connecté (%d connexion(s) au total)", n + 1)
         emit("connected", {"message": "Connexion WebSocket établie"})
 
     @socketio.on("disconnect")
     def ws_disconnect():
         """Client WebSocket déconnecté."""
-        logger.info("Client WebSocket déconnecté")
+        n = next(_ws_disconnects)
+        if n % WS_LOG_SAMPLE == 0 and logger.isEnabledFor(logging.INFO):
+            logger.info("Client WebSocket déconnecté (%d déconnexion(s) au total)", n + 1)
+
+    # Note perf : dans les handlers à haute fréquence ci-dessous, les globales
+    # utilisées à chaque événement sont liées en arguments par défaut
+    # (keyword-only, non surchargeables par le client) : accès LOAD_FAST au
+    # lieu d'une recherche dans le dict du module.
 
     @socketio.on("request_metrics")
-    def ws_request_metrics(data):
+    def ws_request_metrics(data, *, _vm_metrics=_cached_vm_metrics, _emit=emit,
+                           _LibvirtError=LibvirtError, _VMNotFound=VMNotFoundError):
         """
         Le client envoie : {"name": "ma-vm"}
         Le serveur répond avec les métriques de cette VM.
         """
         name = data.get("name", "")
         if not name:
-            emit("error", {"message": "Le champ 'name' est requis."})
+            _emit("error", {"message": "Le champ 'name' est requis."})
             return
 
         try:
-            metrics = manager.vm_metrics(name)
-            emit("vm_metrics", metrics)
-        except VMNotFoundError as e:
-            emit("error", {"message": str(e)})
-        except LibvirtError as e:
-            emit("error", {"message": str(e)})
+            metrics = _vm_metrics(name)
+            _emit("vm_metrics", metrics)
+        except _VMNotFound as e:
+            _emit("error", {"message": str(e)})
+        except _LibvirtError as e:
+            _emit("error", {"message": str(e)})
+
+    # ── Diffusion des métriques (producteur unique) ──
+    # Un seul thread d'arrière-plan interroge libvirt à chaque tick et
+    # diffuse le résultat à la room "metrics" : la charge libvirt ne
+    # dépend plus du nombre de clients connectés.
+    METRICS_ROOM = "metrics"
+    METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "1.0"))
+    _last_all_metrics: dict | None = None
+    _broadcaster_started = False
+    _broadcaster_lock = threading.Lock()
+
+    def _collect_all_metrics() -> dict:
+        """Métriques de toutes les VMs actives (un seul appel libvirt groupé)."""
+        return {"vms": _cached_all_vm_metrics()}
+
+    def _metrics_broadcaster():
+        """Boucle de diffusion : collecte une fois, émet à toute la room."""
+        global _last_all_metrics
+        while True:
+            try:
+                _last_all_metrics = _collect_all_metrics()
+                socketio.emit("all_metrics", _last_all_metrics, to=METRICS_ROOM)
+            except LibvirtError as e:
+                logger.warning("Diffusion des métriques échouée : %s", e)
+            except Exception:
+                # Boucle unique et jamais relancée : aucune erreur ne doit l'arrêter
+                logger.exception("Erreur inattendue dans le diffuseur de métriques")
+            socketio.sleep(METRICS_INTERVAL)
+
+    def _ensure_broadcaster():
+        """Démarre le diffuseur au premier abonnement (pas de balayage sans client)."""
+        global _broadcaster_started
+        with _broadcaster_lock:
+            if _broadcaster_started:
+                return
+            _broadcaster_started = True
+        socketio.start_background_task(_metrics_broadcaster)
+        logger.info("Diffuseur de métriques démarré (intervalle %.1fs)", METRICS_INTERVAL)
 
     @socketio.on("request_all_metrics")
-    def ws_request_all_metrics(data=None):
+    def ws_request_all_metrics(data=None, *, _join_room=join_room, _emit=emit,
+                               _ensure=_ensure_broadcaster, _collect=_collect_all_metrics,
+                               _LibvirtError=LibvirtError):
         """
-        Envoie les métriques de toutes les VMs actives.
+        Abonne le client à la diffusion périodique des métriques de toutes
+        les VMs actives et lui envoie immédiatement le dernier état connu.
         """
+        _join_room(METRICS_ROOM)
+        _ensure()
         try:
-            vms = manager.list_vms()
-            all_metrics = []
-            for vm in vms:
-                if vm["is_active"]:
-                    try:
-                        m = manager.vm_metrics(vm["name"])
-                        all_metrics.append(m)
-                    except LibvirtError:
-                        pass
-            emit("all_metrics", {"vms": all_metrics})
-        except LibvirtError as e:
-            emit("error", {"message": str(e)})
+            # _last_all_metrics change à chaque tick : lecture globale volontaire
+            payload = _last_all_metrics or _collect()
+            _emit("all_metrics", payload)
+        except _LibvirtError as e:
+            _emit("error", {"message": str(e)})
 
     @socketio.on("request_vms_list")
-    def ws_request_vms_list(data=None):
+    def ws_request_vms_list(data=None, *, _list_vms=_cached_list_vms, _emit=emit,
+                            _LibvirtError=LibvirtError):
         """Envoie la liste des VMs via WebSocket."""
         try:
-            vms = manager.list_vms()
-            emit("vms_list", {"count": len(vms), "vms": vms})
-        except LibvirtError as e:
-            emit("error", {"message": str(e)})
+            vms = _list_vms()
+            _emit("vms_list", {"count": len(vms), "vms": vms})
+        except _LibvirtError as e:
+            _emit("error", {"message": str(e)})
+
+
+# ==============================================================
+#  FRONTAL ASGI (optionnel)
+# ==============================================================
+
+if HAS_ASGIREF:
+    _flask_asgi = WsgiToAsgi(app)
+
+    async def _send_json(send, status: int, body: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"access-control-allow-origin", b"*"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def asgi_app(scope, receive, send):
+        """
+        Application ASGI (uvicorn app:asgi_app) : GET / et GET /health sont
+        servis directement, sans traverser la pile Flask (routage, signaux,
+        teardown) ; tout le reste est délégué à Flask via WsgiToAsgi.
+        Les WebSockets Socket.IO ne sont pas disponibles dans ce mode.
+        """
+        if scope["type"] == "http" and scope["method"] == "GET":
+            if scope["path"] == "/":
+                await _send_json(send, 200, _INDEX_BODY)
+                return
+            if scope["path"] == "/health":
+                payload, status_code = _health_payload()
+                await _send_json(send, status_code, json_dumpb(payload))
+                return
+        await _flask_asgi(scope, receive, send)
 
 
 # ==============================================================
 #  POINT D'ENTRÉE
 # ==============================================================
 
+def run_gunicorn(host: str, port: int) -> bool:
+    """
+    Remplace le processus courant par gunicorn (serveur WSGI de production,
+    keep-alive) au lieu du serveur de développement Werkzeug. Le worker
+    importe l'application lui-même après le fork : threads d'arrière-plan
+    (échantillonneur, sonde libvirt, boucle d'événements) et connexions
+    libvirt lui appartiennent, rien n'est hérité de ce processus.
+    Retourne False (sans rien faire) si gunicorn n'est pas installé.
+    """
+    gunicorn = shutil.which("gunicorn")
+    if gunicorn is None:
+        return False
+
+    # Un seul worker : les WebSockets (sessions Socket.IO) et l'état en
+    # mémoire (cache, tâches de fond) ne sont pas partagés entre processus ;
+    # la concurrence passe par les threads ou les green threads.
+    if ASYNC_MODE == "eventlet":
+        options = ["-k", "eventlet", "-w", "1"]
+    else:
+        options = ["-k", "gthread", "-w", "1", "--threads", "100"]
+    os.execv(gunicorn, [
+        gunicorn, *options,
+        "--keep-alive", "5",
+        "--bind", f"{host}:{port}",
+        "--chdir", os.path.dirname(os.path.abspath(__file__)),
+        "app:app",
+    ])
+    return True  # jamais atteint : execv ne rend pas la main
+
+
 if __name__ == "__main__":
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", 5000))
@@ -495,6 +1132,8 @@ if __name__ == "__main__":
     logger.info("  WebSocket : %s", "activé" if HAS_SOCKETIO else "désactivé")
     logger.info("=" * 60)
 
+    if not debug and not run_gunicorn(host, port):
+        logger.warning("gunicorn non installé — repli sur le serveur Werkzeug")
     if HAS_SOCKETIO and socketio is not None:
         socketio.run(app, host=host, port=port, debug=debug, allow_unsafe_werkzeug=True)
     else:
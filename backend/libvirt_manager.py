@@ -6,17 +6,49 @@ Toutes les opérations sur les machines virtuelles passent par la classe
 LibvirtManager afin de garder le code Flask (app.py) propre et découplé.
 """
 
+import atexit
+import io
 import logging
+import os
+import queue
+import stat
+import struct
+import threading
 import time
-import xml.etree.ElementTree as ET
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import CancelledError
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import NamedTuple
+from urllib.parse import urlsplit
+from uuid import uuid4
 
 import libvirt
 
+# lxml (optionnel) : parseur et XPath en C, API compatible ElementTree
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
 # ──────────────────────────────────────────────
 # Configuration du logger
 # ──────────────────────────────────────────────
 logger = logging.getLogger(__name__)
 
+# Sans lxml, ElementTree doit au moins utiliser son accélérateur C
+# (_elementtree) : l'implémentation pure Python est 10 à 20× plus lente.
+# cElementTree n'existe plus depuis Python 3.9, il n'y a rien à importer.
+if not HAS_LXML and ET.Element is getattr(ET, "_Element_Py", None):
+    logger.warning(
+        "xml.etree.ElementTree tourne sans son accélérateur C (_elementtree) : "
+        "installez lxml ou un Python complet pour un parsing XML rapide"
+    )
+
 # ──────────────────────────────────────────────
 # Constantes : mapping des états libvirt
 # ──────────────────────────────────────────────
@@ -31,6 +63,105 @@ VM_STATE_MAP = {
     libvirt.VIR_DOMAIN_PMSUSPENDED: "suspended",
 }
 
+# Même table indexée par l'id d'état : lookup par index, sans hachage
+_STATE_NAMES = tuple(VM_STATE_MAP.get(i, "unknown") for i in range(max(VM_STATE_MAP) + 1))
+
+
+def _state_name(state_id: int) -> str:
+    """Nom lisible d'un état libvirt ("unknown" hors table)."""
+    return _STATE_NAMES[state_id] if 0 <= state_id < len(_STATE_NAMES) else "unknown"
+
+
+def _is_active_state(state_id: int) -> bool:
+    """
+    Équivalent de dom.isActive() sans RPC : libvirt rapporte tout domaine
+    inactif comme SHUTOFF (un domaine « shutdown » ou « crashed » peut
+    encore avoir son processus QEMU).
+    """
+    return state_id != libvirt.VIR_DOMAIN_SHUTOFF
+
+# Fenêtre minimale (s) entre deux échantillons CPU pour calculer un %
+CPU_MIN_WINDOW = 0.5
+
+# Groupes de statistiques nécessaires à la liste des VMs
+LIST_STATS_FLAGS = (
+    libvirt.VIR_DOMAIN_STATS_STATE
+    | libvirt.VIR_DOMAIN_STATS_CPU_TOTAL
+    | libvirt.VIR_DOMAIN_STATS_BALLOON
+    | libvirt.VIR_DOMAIN_STATS_VCPU
+)
+
+# Groupes de statistiques récupérés en un seul appel getAllDomainStats
+BULK_STATS_FLAGS = (
+    libvirt.VIR_DOMAIN_STATS_STATE
+    | libvirt.VIR_DOMAIN_STATS_CPU_TOTAL
+    | libvirt.VIR_DOMAIN_STATS_BALLOON
+    | libvirt.VIR_DOMAIN_STATS_VCPU
+    | libvirt.VIR_DOMAIN_STATS_INTERFACE
+    | libvirt.VIR_DOMAIN_STATS_BLOCK
+)
+
+
+# XPaths des chemins chauds, compilées une seule fois (lxml uniquement)
+if HAS_LXML:
+    # Chemins relatifs à <domain> : pas d'axe descendant, le schéma est fixe
+    _XP_DISK_TARGETS = ET.XPath("devices/disk[@device='disk']/target/@dev")
+    _XP_DISKS = ET.XPath("devices/disk[@device='disk']")
+    _XP_IFACES = ET.XPath("devices/interface/target/@dev")
+    _XP_OSTYPE = ET.XPath("string(os/type)")
+    _XP_VNC_PORT = ET.XPath("string(devices/graphics[@type='vnc']/@port)")
+
+# Délai (s) au-delà duquel un appel libvirt est abandonné
+RPC_TIMEOUT = 5.0
+
+# Délai (s) des actions de cycle de vie : destroy attend la fin de QEMU,
+# create son lancement
+ACTION_TIMEOUT = 30.0
+
+# Nombre maximal d'appels libvirt surveillés en parallèle par le watchdog
+RPC_WORKERS = 16
+
+# Appels abandonnés (délai dépassé, toujours bloqués dans leur thread) tolérés
+# par domaine puis au total : au-delà, les nouveaux appels échouent aussitôt
+# au lieu d'occuper un worker de plus. Une VM bloquée ne peut ainsi pas
+# épuiser le watchdog pour toutes les autres.
+RPC_STUCK_PER_DOMAIN = 1
+RPC_STUCK_MAX = RPC_WORKERS // 2
+
+# Nombre maximal de RPC de statistiques par périphérique lancés en parallèle
+IO_WORKERS = 8
+
+# Opérations longues (snapshots, arrêts) exécutées en tâche de fond, et
+# nombre de tâches suivies (au-delà, les terminées les plus anciennes sont
+# oubliées ; si aucune ne l'est, les nouvelles sont refusées)
+JOB_WORKERS = 4
+JOB_HISTORY = 256
+
+# Âge maximal (s) de l'état des VMs servi depuis la RAM : filet de sécurité
+# si un événement est manqué et que l'échantillonneur ne tourne pas
+STATE_MAX_AGE = 60.0
+
+# Durée (s) pendant laquelle les infos de l'hôte (nom, modèle CPU, version
+# libvirt...) sont servies sans être relues
+HOST_INFO_TTL = 3600.0
+
+# Nombre maximal de descriptions XML parsées gardées en mémoire
+XML_CACHE_SIZE = 256
+
+# Événements domaine qui rendent le XML en cache obsolète
+XML_EVICT_EVENTS = (
+    libvirt.VIR_DOMAIN_EVENT_ID_LIFECYCLE,
+    libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_ADDED,
+    libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED,
+)
+
+# En-tête qcow2 : signature, puis taille virtuelle (u64 big-endian) à l'octet 24
+QCOW2_MAGIC = b"QFI\xfb"
+QCOW2_HEADER = struct.Struct(">4s20xQ")
+
+# Champs d'un <domainsnapshot> lus par list_snapshots
+_SNAPSHOT_FIELDS = frozenset({"creationTime", "state"})
+
 
 class LibvirtError(Exception):
     """Exception personnalisée pour les erreurs libvirt."""
@@ -47,23 +178,433 @@ class LibvirtConnectionError(LibvirtError):
     pass
 
 
+class LibvirtTimeoutError(LibvirtError):
+    """Levée lorsqu'un appel libvirt ne répond pas dans le délai imparti."""
+    pass
+
+
+class LibvirtBlockedError(LibvirtTimeoutError):
+    """
+    Levée sans rien envoyer à libvirt : un appel précédent sur le même
+    domaine (ou trop d'appels au total) est resté bloqué. La connexion
+    utilisée n'est pas en cause.
+    """
+    pass
+
+
+class JobNotFoundError(LibvirtError):
+    """Levée lorsque l'identifiant de tâche demandé est inconnu."""
+    pass
+
+
+class JobQueueFullError(LibvirtError):
+    """Levée lorsque JOB_HISTORY tâches sont déjà en attente ou en cours."""
+    pass
+
+
+class _ConnPool:
+    """
+    Pool borné de connexions libvirt, partagé entre les threads Flask.
+
+    Une connexion unique sérialiserait les appels sur son verrou interne,
+    une connexion par requête paierait le handshake à chaque fois et
+    finirait par atteindre `max_clients` côté libvirtd. Les connexions
+    sont ouvertes paresseusement, jusqu'à `size`, et celles qui ne sont
+    plus vivantes sont jetées puis rouvertes à la demande.
+    """
+
+    def __init__(self, opener, size: int = 4, timeout: float = 30.0):
+        self._opener = opener
+        self._size = max(1, size)
+        self._timeout = timeout
+        # LIFO : la connexion la plus récemment rendue (donc la plus « chaude »)
+        # ressert en premier ; les autres restent au fond de la pile
+        self._idle = _queue.LifoQueue(maxsize=self._size)
+        self._created = 0
+        self._lock = _threading.Lock()
+
+    @staticmethod
+    def _is_alive(conn: libvirt.virConnect) -> bool:
+        try:
+            return conn.isAlive() == 1
+        except libvirt.libvirtError:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: libvirt.virConnect) -> None:
+        try:
+            conn.close()
+        except libvirt.libvirtError:
+            pass
+
+    def _discard(self, conn: libvirt.virConnect) -> None:
+        self._close_quietly(conn)
+        with self._lock:
+            self._created -= 1
+
+    def _checkout(self) -> libvirt.virConnect:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except _queue.Empty:
+                with self._lock:
+                    can_open = self._created < self._size
+                    if can_open:
+                        self._created += 1
+                if can_open:
+                    try:
+                        return self._opener()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                try:
+                    conn = self._idle.get(timeout=self._timeout)
+                except _queue.Empty:
+                    raise LibvirtConnectionError(
+                        f"Aucune connexion libvirt libre après {self._timeout:.0f}s"
+                    )
+
+            if self._is_alive(conn):
+                return conn
+            logger.warning("Connexion libvirt morte retirée du pool")
+            self._discard(conn)
+
+    def _release(self, conn: libvirt.virConnect) -> None:
+        if not self._is_alive(conn):
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except _queue.Full:
+            self._discard(conn)
+
+    @contextmanager
+    def acquire(self) -> Iterator[libvirt.virConnect]:
+        """Emprunte une connexion pour la durée du bloc `with`."""
+        conn = self._checkout()
+        try:
+            yield conn
+        except LibvirtTimeoutError as e:
+            # Un RPC est peut-être encore bloqué dessus : ne pas la recycler
+            if isinstance(e, LibvirtBlockedError):
+                self._release(conn)
+            else:
+                self._discard(conn)
+            raise
+        except BaseException:
+            # VM introuvable, erreur libvirt... : la connexion reste saine
+            self._release(conn)
+            raise
+        else:
+            self._release(conn)
+
+    def close_all(self) -> None:
+        """Ferme toutes les connexions inactives."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except _queue.Empty:
+                return
+            self._discard(conn)
+
+
+# ──────────────────────────────────────────────
+# Boucle d'événements libvirt (process-wide)
+# ──────────────────────────────────────────────
+def _green_threads() -> bool:
+    """Vrai si eventlet a monkey-patché threading (threads = greenlets)."""
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched("thread")
+
+
+def _native_module(name: str):
+    """
+    Module threading/queue « système ». Sous eventlet, les versions
+    monkey-patchées fournissent des verrous et files « verts », qui ne
+    fonctionnent pas entre threads natifs : le gestionnaire tourne dans les
+    threads de tpool, de l'échantillonneur et de ses exécuteurs, et un
+    acquire() contesté y attendrait un hub qui ne se réveille jamais.
+    """
+    if _green_threads():
+        from eventlet import patcher
+        return patcher.original(name)
+    return threading if name == "threading" else queue
+
+
+_threading = _native_module("threading")
+_queue = _native_module("queue")
+
+
+def _native_thread_class():
+    """
+    Classe Thread « système ». Sous eventlet, threading est monkey-patché :
+    virEventRunDefaultImpl() bloquerait alors le hub entier dans poll().
+    """
+    return _threading.Thread
+
+
+class _NativeFuture:
+    """Résultat d'un appel confié à _NativeExecutor (sous-ensemble de concurrent.futures.Future)."""
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self._done = _threading.Event()
+        self._state = "pending"
+        self._result = None
+        self._error: BaseException | None = None
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._state != "pending":
+                return False
+            self._state = "running"
+            return True
+
+    def _finish(self, result=None, error: BaseException | None = None) -> None:
+        self._result, self._error = result, error
+        with self._lock:
+            self._state = "finished"
+        self._done.set()
+
+    def cancel(self) -> bool:
+        """Annule l'appel s'il n'a pas commencé ; sans effet sur un appel en cours."""
+        with self._lock:
+            if self._state != "pending":
+                return False
+            self._state = "cancelled"
+        self._error = CancelledError()
+        self._done.set()
+        return True
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: float | None = None):
+        if not self._done.wait(timeout):
+            raise FuturesTimeoutError()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class _NativeExecutor:
+    """
+    Pool borné de threads natifs et démons, à l'interface de
+    ThreadPoolExecutor (submit, map, shutdown). Contrairement à ce dernier :
+    - sous eventlet, threads, verrous et files restent natifs (cf.
+      _native_module), donc utilisables depuis tpool ;
+    - un appel libvirt resté bloqué n'empêche pas l'arrêt de l'interpréteur.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self._max_workers = max_workers
+        self._prefix = thread_name_prefix
+        self._queue = _queue.SimpleQueue()
+        self._threads: list = []
+        self._idle = 0
+        self._lock = _threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs) -> _NativeFuture:
+        future = _NativeFuture()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("exécuteur arrêté")
+            self._queue.put((future, fn, args, kwargs))
+            # Threads créés à la demande, jusqu'à max_workers
+            # _idle = threads en attente - appels pas encore pris en charge
+            if self._idle <= 0 and len(self._threads) < self._max_workers:
+                thread = _threading.Thread(
+                    target=self._worker, name=f"{self._prefix}_{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            else:
+                self._idle -= 1
+        return future
+
+    def map(self, fn, iterable) -> Iterator:
+        """Comme Executor.map : soumis d'un coup, résultats dans l'ordre."""
+        futures = [self.submit(fn, item) for item in iterable]
+        return (future.result() for future in futures)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except _queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if future._start():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future._finish(error=e)
+                else:
+                    future._finish(result)
+            with self._lock:
+                self._idle += 1
+
+
+_EVENT_LOOP_LOCK = _threading.Lock()
+_event_loop_started = False
+
+
+def _event_loop() -> None:
+    while True:
+        if libvirt.virEventRunDefaultImpl() < 0:
+            logger.warning("virEventRunDefaultImpl a échoué")
+            time.sleep(1)
+
+
+def _start_event_loop() -> bool:
+    """
+    Enregistre l'implémentation d'événements par défaut et lance son thread.
+    Doit précéder l'ouverture de toute connexion : c'est elle qui fait
+    tourner les keepalives des connexions inactives du pool et livre les
+    événements domaine.
+    """
+    global _event_loop_started
+    with _EVENT_LOOP_LOCK:
+        if not _event_loop_started:
+            try:
+                libvirt.virEventRegisterDefaultImpl()
+            except (AttributeError, libvirt.libvirtError) as e:
+                logger.warning("Boucle d'événements libvirt indisponible : %s", e)
+                return False
+            _native_thread_class()(target=_event_loop, name="libvirt-events", daemon=True).start()
+            _event_loop_started = True
+        return True
+
+
+# Dès l'import, avant la première connexion
+_EVENTS_AVAILABLE = _start_event_loop()
+
+
+class ParsedXml(NamedTuple):
+    """Description XML d'un domaine, parsée une fois avec ses champs dérivés."""
+    root: ET.Element
+    disk_targets: list[str]
+    iface_names: list[str]
+    vcpus: int
+    max_memory_kib: int
+    os_type: str
+
+
+class VMSummary(NamedTuple):
+    """Identité et état d'une VM, sans XML : suffit aux compteurs du dashboard."""
+    name: str
+    uuid: str
+    state: str
+
+
+@dataclass(slots=True)
+class VMInfo:
+    """Infos de base d'une VM (liste, état en mémoire). Sérialisé en JSON tel quel."""
+    name: str
+    uuid: str
+    state: str
+    vcpus: int
+    memory_mb: int
+    used_memory_mb: int
+    uptime_seconds: int | None
+    is_active: bool
+
+
 class LibvirtManager:
     """
     Gestionnaire libvirt — fournit une interface haut niveau pour
     lister, contrôler et superviser les VMs KVM.
     """
 
-    def __init__(self, uri: str = "qemu:///system"):
+    def __init__(self, uri: str = "qemu:///system", pool_size: int = 4,
+                 rpc_timeout: float = RPC_TIMEOUT):
         """
         Paramètres
         ----------
         uri : str
             URI de connexion libvirt (par défaut : qemu:///system pour
             une installation KVM locale).
+        pool_size : int
+            Nombre maximal de connexions libvirt ouvertes simultanément.
+        rpc_timeout : float
+            Délai (s) avant d'abandonner un appel libvirt bloqué.
         """
         self.uri = uri
-        # Cache léger pour le calcul du CPU%
+        # URI sans hôte (qemu:///system) : les images disque sont lisibles ici
+        self._local = not urlsplit(uri).netloc
+        self.rpc_timeout = rpc_timeout
+        # Cache léger pour le calcul du CPU%, par UUID (stable, contrairement
+        # au nom qui peut changer par renommage)
         self._cpu_cache: dict[str, dict] = {}
+        # Derniers compteurs I/O : (UUID, "disk"|"net", périphérique) ->
+        # (instant, compteur a, compteur b, débit a, débit b)
+        self._io_cache: dict[tuple, tuple] = {}
+        # Dernières métriques des VMs actives (nom -> dict vm_metrics),
+        # publiées par l'échantillonneur d'arrière-plan
+        self._metrics_cache: dict[str, dict] = {}
+        self._metrics_at = 0.0
+        self._sample_interval: float | None = None
+        # Infos de l'hôte pour global_stats, relues toutes les HOST_INFO_TTL s
+        self._host_info: dict | None = None
+        self._host_info_at = 0.0
+        # Connexions longue durée réutilisées entre les appels : évite un
+        # handshake/authentification par requête.
+        self._pool = _ConnPool(self._connect, size=pool_size)
+        # Exécuteurs à threads natifs (y compris sous eventlet, cf.
+        # _NativeExecutor) : RPC par périphérique de vm_metrics, watchdog des
+        # appels susceptibles de bloquer, tâches de fond (submit_job)
+        self._io_pool = _NativeExecutor(IO_WORKERS, "libvirt-io")
+        self._rpc_pool = _NativeExecutor(RPC_WORKERS, "libvirt-rpc")
+        # Appels abandonnés encore bloqués, par domaine (cf. _with_timeout)
+        self._rpc_stuck: dict[str, int] = {}
+        self._rpc_lock = _threading.Lock()
+        self._job_pool = _NativeExecutor(JOB_WORKERS, "libvirt-job")
+        # Tâches de fond : id -> suivi, les terminées les plus anciennes
+        # oubliées au-delà de JOB_HISTORY
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._jobs_lock = _threading.Lock()
+        # XML parsé par UUID : (id du domaine, ParsedXml). N'est utilisé que
+        # tant que l'abonnement aux événements est actif pour l'invalider.
+        self._xml_cache: OrderedDict[str, tuple[int, ParsedXml]] = OrderedDict()
+        # Générations (globale et par UUID) avancées à chaque invalidation,
+        # y compris par les modifications faites ici (update_resources, revert)
+        self._xml_epoch = 0
+        self._xml_gen: dict[str, int] = {}
+        self._xml_lock = _threading.Lock()
+        self._event_conn: libvirt.virConnect | None = None
+        self._event_lock = _threading.Lock()
+        self._events_enabled = _EVENTS_AVAILABLE
+        # État des VMs (uuid -> infos de base) servi depuis la RAM. Il est
+        # périmé par les événements libvirt et par les actions locales ;
+        # _state_gen évite qu'un rafraîchissement lancé avant un événement
+        # ne republie un état antérieur comme frais.
+        self._state: dict[str, VMInfo] = {}
+        self._state_lock = _threading.Lock()
+        self._state_at = 0.0
+        self._state_gen = 0
+        atexit.register(self.close)
 
     # ──────────────────────────────────────────
     # Connexion
@@ -79,6 +620,138 @@ class LibvirtManager:
             logger.error("Connexion libvirt impossible : %s", e)
             raise LibvirtConnectionError(f"Impossible de se connecter à libvirt : {e}")
 
+    def ping(self) -> None:
+        """Vérifie que libvirt répond. Lève LibvirtConnectionError sinon."""
+        with self._conn() as conn:
+            try:
+                conn.getLibVersion()
+            except libvirt.libvirtError as e:
+                raise LibvirtConnectionError(f"libvirt ne répond pas : {e}")
+
+    @contextmanager
+    def _conn(self) -> Iterator[libvirt.virConnect]:
+        """Connexion empruntée au pool pour la durée du bloc `with`."""
+        with self._pool.acquire() as conn:
+            yield conn
+
+    def close(self) -> None:
+        """Ferme les connexions du pool (appelé automatiquement à l'arrêt)."""
+        self._job_pool.shutdown(wait=False, cancel_futures=True)
+        self._pool.close_all()
+        with self._event_lock:
+            conn, self._event_conn = self._event_conn, None
+        if conn is not None:
+            _ConnPool._close_quietly(conn)
+
+    # ──────────────────────────────────────────
+    # Abonnement aux événements domaine
+    # ──────────────────────────────────────────
+    def _ensure_event_watch(self) -> bool:
+        """
+        Garantit une connexion dédiée (hors pool) abonnée aux événements
+        qui invalident le cache XML. Retourne False si l'abonnement est
+        impossible : le cache est alors contourné.
+        """
+        if not self._events_enabled:
+            return False
+        with self._event_lock:
+            if self._event_conn is not None and _ConnPool._is_alive(self._event_conn):
+                return True
+            if self._event_conn is not None:
+                _ConnPool._close_quietly(self._event_conn)
+                self._event_conn = None
+            # Les événements manqués pendant la coupure sont perdus : repartir à vide
+            self._invalidate_xml()
+            self._mark_state_dirty()
+            try:
+                conn = self._connect()
+            except LibvirtConnectionError:
+                return False
+            try:
+                for event_id in XML_EVICT_EVENTS:
+                    conn.domainEventRegisterAny(None, event_id, self._on_domain_event, None)
+                conn.setKeepAlive(5, 3)
+            except libvirt.libvirtError as e:
+                logger.warning("Abonnement aux événements libvirt impossible : %s", e)
+                _ConnPool._close_quietly(conn)
+                return False
+            self._event_conn = conn
+            return True
+
+    def _on_domain_event(self, conn, dom, *args) -> None:
+        """Callback libvirt : toute modification du domaine périme son XML et l'état."""
+        self._mark_state_dirty()
+        try:
+            self._invalidate_xml(dom.UUIDString())
+        except libvirt.libvirtError:
+            self._invalidate_xml()
+
+    def _invalidate_xml(self, uuid: str | None = None) -> None:
+        """
+        Oublie le XML parsé d'un domaine (ou de tous si uuid est None) et
+        avance sa génération : un parsing lancé avant ne sera pas mis en cache.
+        """
+        with self._xml_lock:
+            if uuid is None:
+                self._xml_cache.clear()
+                self._xml_epoch += 1
+            else:
+                self._xml_cache.pop(uuid, None)
+                self._xml_gen[uuid] = self._xml_gen.get(uuid, 0) + 1
+
+    def _xml_generation(self, uuid: str) -> tuple[int, int]:
+        with self._xml_lock:
+            return self._xml_epoch, self._xml_gen.get(uuid, 0)
+
+    def _with_timeout(self, fn, *args, timeout: float | None = None, key: str | None = None):
+        """
+        Exécute fn(*args) avec un délai maximal. Un libvirtd bloqué (verrou
+        de changement d'état perdu, etc.) ne gèle plus le worker Flask :
+        LibvirtTimeoutError est levée et l'appel est abandonné à son thread.
+        `key` identifie le domaine visé (par défaut l'UUID du domaine dont fn
+        est une méthode) : tant qu'un appel abandonné sur ce domaine reste
+        bloqué, les suivants échouent sans occuper de worker.
+        """
+        timeout = timeout or self.rpc_timeout
+        name = getattr(fn, "__name__", repr(fn))
+        if key is None:
+            target = getattr(fn, "__self__", None)
+            key = target.UUIDString() if isinstance(target, libvirt.virDomain) else "connexion"
+
+        with self._rpc_lock:
+            if self._rpc_stuck.get(key, 0) >= RPC_STUCK_PER_DOMAIN:
+                raise LibvirtBlockedError(f"libvirt ne répond pas ({name}, appel précédent toujours bloqué)")
+            if sum(self._rpc_stuck.values()) >= RPC_STUCK_MAX:
+                raise LibvirtBlockedError(f"libvirt ne répond pas ({name}, trop d'appels bloqués)")
+
+        # Sous _rpc_lock : fin de l'appel et abandon ne peuvent pas se croiser
+        state = {"finished": False, "abandoned": False}
+
+        def call():
+            try:
+                return fn(*args)
+            finally:
+                with self._rpc_lock:
+                    state["finished"] = True
+                    if state["abandoned"]:
+                        remaining = self._rpc_stuck[key] - 1
+                        if remaining:
+                            self._rpc_stuck[key] = remaining
+                        else:
+                            del self._rpc_stuck[key]
+                        logger.info("Appel libvirt %s abandonné terminé", name)
+
+        future = self._rpc_pool.submit(call)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            with self._rpc_lock:
+                if not future.cancel() and not state["finished"]:
+                    state["abandoned"] = True
+                    self._rpc_stuck[key] = self._rpc_stuck.get(key, 0) + 1
+            logger.error("Appel libvirt %s sans réponse après %.1f s", name, timeout)
+            raise LibvirtTimeoutError(f"libvirt ne répond pas ({name}, {timeout:.1f} s)")
+
     # ──────────────────────────────────────────
     # Recherche d'une VM par nom
     # ──────────────────────────────────────────
@@ -93,43 +766,155 @@ class LibvirtManager:
     # ──────────────────────────────────────────
     # Helpers XML
     # ──────────────────────────────────────────
+    def _parse_xml(self, dom: libvirt.virDomain) -> ET.Element:
+        """Parse le XML de description d'un domaine (via le cache)."""
+        return self._parsed_xml(dom).root
+
+    def _parsed_xml(self, dom: libvirt.virDomain) -> ParsedXml:
+        """
+        XML parsé et champs dérivés d'un domaine, en cache par UUID.
+        L'id du domaine change à chaque démarrage/arrêt : il sert de garde
+        supplémentaire au cas où un événement serait manqué.
+        """
+        cached = self._cached_xml(dom)
+        if cached is not None:
+            return cached
+
+        use_cache = self._ensure_event_watch()
+        uuid = dom.UUIDString()
+        dom_id = dom.ID()
+        generation = self._xml_generation(uuid)
+        # Octets : lxml parse directement l'UTF-8 sans repasser par str
+        root = ET.fromstring(self._with_timeout(dom.XMLDesc, 0).encode())
+        parsed = ParsedXml(
+            root=root,
+            disk_targets=self._get_disk_targets(root),
+            iface_names=self._get_network_interfaces(root),
+            vcpus=self._get_vcpus_from_xml(root),
+            max_memory_kib=self._get_max_memory_from_xml(root),
+            os_type=self._get_os_type(root),
+        )
+        if use_cache:
+            with self._xml_lock:
+                if (self._xml_epoch, self._xml_gen.get(uuid, 0)) != generation:
+                    return parsed
+                self._xml_cache[uuid] = (dom_id, parsed)
+                self._xml_cache.move_to_end(uuid)
+                while len(self._xml_cache) > XML_CACHE_SIZE:
+                    self._xml_cache.popitem(last=False)
+        return parsed
+
+    def _cached_xml(self, dom: libvirt.virDomain) -> ParsedXml | None:
+        """XML parsé en cache pour ce domaine, sans aucun RPC ; None sinon."""
+        if not self._ensure_event_watch():
+            return None
+        uuid = dom.UUIDString()
+        with self._xml_lock:
+            entry = self._xml_cache.get(uuid)
+            if entry is not None and entry[0] == dom.ID():
+                self._xml_cache.move_to_end(uuid)
+                return entry[1]
+        return None
+
+    @staticmethod
+    def _xml_fields(xml_bytes: bytes, wanted: frozenset[str] = frozenset({"memory", "vcpu"})
+                    ) -> dict[str, str | None]:
+        """
+        Lit en flux le texte des enfants directs de la racine (<domain>,
+        <domainsnapshot>) nommés dans
+        `wanted` et s'arrête dès qu'ils sont tous vus. Chaque enfant est
+        vidé une fois lu : l'arbre partiel ne grossit pas.
+        """
+        found: dict[str, str | None] = {}
+        depth = 0
+        for event, elem in ET.iterparse(io.BytesIO(xml_bytes), events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                if elem.tag in wanted and elem.tag not in found:
+                    found[elem.tag] = elem.text
+                elem.clear()
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    @classmethod
+    def _shallow_mem_vcpus(cls, xml_bytes: bytes) -> tuple[int, int]:
+        """
+        (RAM max en KiB, vCPUs) sans construire l'arbre complet : <memory>
+        et <vcpu> précèdent <devices>, qui n'est jamais parsé.
+        """
+        fields = cls._xml_fields(xml_bytes)
+        return int(fields.get("memory") or 0), int(fields.get("vcpu") or 0)
+
+    @staticmethod
+    def _devices(root: ET.Element, tag: str) -> Iterator[ET.Element]:
+        """
+        Enfants <tag> de <devices>. Le schéma libvirt place disques et
+        interfaces directement sous <devices> : pas de parcours de tout l'arbre.
+        """
+        devices = root.find("devices")
+        return devices.iterfind(tag) if devices is not None else iter(())
+
+    @staticmethod
+    def _disk_elements(root: ET.Element) -> list[ET.Element]:
+        """Éléments <disk device="disk"> (les lecteurs cdrom/floppy sont exclus)."""
+        if HAS_LXML:
+            return _XP_DISKS(root)
+        return [d for d in LibvirtManager._devices(root, "disk") if d.get("device") == "disk"]
+
+    @staticmethod
+    def _get_os_type(root: ET.Element) -> str:
+        """Type d'OS invité (hvm, xen...), "unknown" s'il est absent."""
+        if HAS_LXML:
+            return str(_XP_OSTYPE(root)) or "unknown"
+        return root.findtext("os/type", default="unknown")
+
     @staticmethod
-    def _parse_xml(dom: libvirt.virDomain) -> ET.Element:
-        """Parse le XML de description d'un domaine."""
-        xml_str = dom.XMLDesc(0)
-        return ET.fromstring(xml_str)
+    def _get_vnc_port(root: ET.Element) -> str | None:
+        """Port de la console VNC, None sans console VNC."""
+        if HAS_LXML:
+            return str(_XP_VNC_PORT(root)) or None
+        graphics = root.find("devices/graphics[@type='vnc']")
+        return graphics.get("port") if graphics is not None else None
 
     @staticmethod
     def _get_max_memory_from_xml(root: ET.Element) -> int:
         """Retourne la RAM max configurée (en KiB) depuis le XML."""
-        mem_elem = root.find("memory")
-        if mem_elem is not None and mem_elem.text:
-            return int(mem_elem.text)
-        return 0
+        return int(root.findtext("memory", default="") or 0)
 
     @staticmethod
     def _get_vcpus_from_xml(root: ET.Element) -> int:
         """Retourne le nombre de vCPUs configurés depuis le XML."""
-        vcpu_elem = root.find("vcpu")
-        if vcpu_elem is not None and vcpu_elem.text:
-            return int(vcpu_elem.text)
-        return 0
+        return int(root.findtext("vcpu", default="") or 0)
 
     @staticmethod
     def _get_disk_targets(root: ET.Element) -> list[str]:
         """Retourne la liste des périphériques disque (ex: vda, sda)."""
+        if HAS_LXML:
+            return [str(dev) for dev in _XP_DISK_TARGETS(root) if dev]
         targets = []
-        for disk in root.findall(".//disk[@device='disk']/target"):
-            dev = disk.get("dev")
-            if dev:
-                targets.append(dev)
+        for disk in LibvirtManager._disk_elements(root):
+            target = disk.find("target")
+            if target is not None and target.get("dev"):
+                targets.append(target.get("dev"))
         return targets
 
-    def _get_disks_info(self, dom: libvirt.virDomain, conn: libvirt.virConnect) -> list[dict]:
-        """Retourne les détails des disques (device, path, capacité)."""
-        root = self._parse_xml(dom)
+    def _get_disks_info(self, dom: libvirt.virDomain, conn: libvirt.virConnect,
+                        active: bool | None = None, root: ET.Element | None = None) -> list[dict]:
+        """
+        Retourne les détails des disques (device, path, capacité).
+        `active` : état déjà connu de l'appelant ; sinon un seul isActive()
+        pour tous les disques. `root` : XML déjà parsé par l'appelant.
+        """
+        if root is None:
+            root = self._parse_xml(dom)
+        if active is None:
+            active = dom.isActive() == 1
         disks = []
-        for disk in root.findall(".//disk[@device='disk']"):
+        for disk in self._disk_elements(root):
             target = disk.find("target")
             dev = target.get("dev") if target is not None else "unknown"
 
@@ -141,13 +926,18 @@ class LibvirtManager:
 
             try:
                 # 1. Si VM active => blockInfo est fiable
-                if dom.isActive():
+                if active:
                     # blockInfo retourne (capacity, allocation, physical)
                     info = dom.blockInfo(dev)
                     capacity = info[0]
                     allocation = info[1]
                 
-                # 2. Si VM inactive et path connu => Lookup volume
+                # 2. Si VM inactive et image locale => stat + en-tête qcow2,
+                # sans RPC (et même hors pool de stockage géré)
+                elif path and (sizes := self._local_image_sizes(path, disk)):
+                    capacity, allocation = sizes
+
+                # 3. Sinon => Lookup volume
                 elif path:
                     vol = conn.storageVolLookupByPath(path)
                     # info retourne (type, capacity, allocation)
@@ -166,30 +956,67 @@ class LibvirtManager:
             })
         return disks
 
+    def _local_image_sizes(self, path: str, disk: ET.Element) -> tuple[int, int] | None:
+        """
+        (capacité, allocation) d'une image disque lue directement sur l'hôte :
+        taille virtuelle depuis l'en-tête qcow2 (ou taille du fichier pour
+        une image raw), blocs réellement alloués via os.stat. None si l'image
+        n'est pas lisible ici ou d'un autre format : l'appelant se replie
+        alors sur le pilote de stockage libvirt.
+        """
+        if not self._local:
+            return None
+        driver = disk.find("driver")
+        fmt = driver.get("type") if driver is not None else None
+        try:
+            st = os.stat(path)
+            if not stat.S_ISREG(st.st_mode):
+                return None
+            if fmt == "raw":
+                capacity = st.st_size
+            else:
+                with open(path, "rb") as f:
+                    header = f.read(QCOW2_HEADER.size)
+                if len(header) < QCOW2_HEADER.size:
+                    return None
+                magic, capacity = QCOW2_HEADER.unpack(header)
+                if magic != QCOW2_MAGIC:
+                    return None
+        except OSError:
+            return None
+        return capacity, st.st_blocks * 512
+
     @staticmethod
     def _get_network_interfaces(root: ET.Element) -> list[str]:
         """Retourne la liste des interfaces réseau (ex: vnet0)."""
+        if HAS_LXML:
+            return [str(dev) for dev in _XP_IFACES(root) if dev]
         ifaces = []
-        for iface in root.findall(".//interface/target"):
-            dev = iface.get("dev")
-            if dev:
-                ifaces.append(dev)
+        for iface in LibvirtManager._devices(root, "interface"):
+            target = iface.find("target")
+            if target is not None and target.get("dev"):
+                ifaces.append(target.get("dev"))
         return ifaces
 
     # ──────────────────────────────────────────
     # Informations basiques d'une VM
     # ──────────────────────────────────────────
-    def _vm_basic_info(self, dom: libvirt.virDomain) -> dict:
+    def _vm_basic_info(self, dom: libvirt.virDomain, xml: ParsedXml | None = None) -> VMInfo:
         """
         Retourne les informations de base d'une VM :
         nom, état, vCPUs, RAM (MiB), UUID, uptime estimé.
         """
-        state_id, max_mem_kib, mem_kib, vcpus, cpu_time_ns = dom.info()
-        state_str = VM_STATE_MAP.get(state_id, "unknown")
-
-        root = self._parse_xml(dom)
-        max_mem_xml = self._get_max_memory_from_xml(root)
-        vcpus_xml = self._get_vcpus_from_xml(root)
+        state_id, max_mem_kib, mem_kib, vcpus, cpu_time_ns = self._with_timeout(dom.info)
+        state_str = _state_name(state_id)
+
+        if xml is None:
+            xml = self._cached_xml(dom)
+        if xml is not None:
+            max_mem_xml = xml.max_memory_kib
+            vcpus_xml = xml.vcpus
+        else:
+            # Seuls <memory> et <vcpu> sont utiles : pas d'arbre complet
+            max_mem_xml, vcpus_xml = self._shallow_mem_vcpus(self._with_timeout(dom.XMLDesc, 0).encode())
 
         # Calcul de l'uptime approximatif (si la VM tourne)
         uptime_seconds = None
@@ -202,66 +1029,238 @@ class LibvirtManager:
             except Exception:
                 uptime_seconds = None
 
-        return {
-            "name":       dom.name(),
-            "uuid":       dom.UUIDString(),
-            "state":      state_str,
-            "vcpus":      vcpus_xml or vcpus,
-            "memory_mb":  round((max_mem_xml or max_mem_kib) / 1024),
-            "used_memory_mb": round(mem_kib / 1024),
-            "uptime_seconds": uptime_seconds,
-            "is_active":  dom.isActive() == 1,
-        }
+        return VMInfo(
+            name=dom.name(),
+            uuid=dom.UUIDString(),
+            state=state_str,
+            vcpus=vcpus_xml or vcpus,
+            memory_mb=round((max_mem_xml or max_mem_kib) / 1024),
+            used_memory_mb=round(mem_kib / 1024),
+            uptime_seconds=uptime_seconds,
+            is_active=_is_active_state(state_id),
+        )
+
+    def _vm_info_from_stats(self, dom: libvirt.virDomain, stats: dict) -> VMInfo:
+        """
+        Même résultat que _vm_basic_info, mais lu dans un enregistrement
+        getAllDomainStats : ni dom.info() ni XMLDesc/parsing XML.
+        """
+        state_id = stats.get("state.state", libvirt.VIR_DOMAIN_NOSTATE)
+        cpu_time_ns = stats.get("cpu.time", 0)
+
+        # Calcul de l'uptime approximatif (temps CPU cumulé, si la VM tourne)
+        uptime_seconds = None
+        if state_id == libvirt.VIR_DOMAIN_RUNNING and cpu_time_ns > 0:
+            uptime_seconds = int(cpu_time_ns / 1_000_000_000)
+
+        return VMInfo(
+            name=dom.name(),
+            uuid=dom.UUIDString(),
+            state=_state_name(state_id),
+            vcpus=stats.get("vcpu.maximum") or stats.get("vcpu.current", 0),
+            memory_mb=round(stats.get("balloon.maximum", 0) / 1024),
+            used_memory_mb=round(stats.get("balloon.current", 0) / 1024),
+            uptime_seconds=uptime_seconds,
+            is_active=_is_active_state(state_id),
+        )
+
+    @staticmethod
+    def _bulk_stats(conn: libvirt.virConnect) -> list[tuple[libvirt.virDomain, dict]]:
+        """Un seul RPC : état, CPU, mémoire et vCPUs de toutes les VMs."""
+        return conn.getAllDomainStats(LIST_STATS_FLAGS, 0)
+
+    # ──────────────────────────────────────────
+    # ÉTAT DES VMs EN MÉMOIRE
+    # ──────────────────────────────────────────
+    def _mark_state_dirty(self) -> None:
+        """Force le prochain accès à relire l'état auprès de libvirt."""
+        with self._state_lock:
+            self._state_gen += 1
+            self._state_at = 0.0
+            self._metrics_at = 0.0
+
+    def _publish_state(self, vms: list[VMInfo], gen: int) -> None:
+        """Remplace l'état en mémoire ; il n'est frais que si rien n'a changé depuis `gen`."""
+        with self._state_lock:
+            self._state = {vm.uuid: vm for vm in vms}
+            self._state_at = time.monotonic() if gen == self._state_gen else 0.0
+
+    def _state_snapshot(self) -> list[VMInfo] | None:
+        """Liste des VMs depuis la RAM, ou None si l'état doit être relu."""
+        if not self._ensure_event_watch():
+            return None
+        with self._state_lock:
+            if self._state_at and time.monotonic() - self._state_at < STATE_MAX_AGE:
+                return list(self._state.values())
+        return None
+
+    @staticmethod
+    def _sort_vms(vms: list[VMInfo]) -> list[VMInfo]:
+        """Actives d'abord, dans l'ordre renvoyé par libvirt."""
+        vms.sort(key=lambda vm: not vm.is_active)
+        return vms
 
     # ──────────────────────────────────────────
     # LISTE DES VMs
     # ──────────────────────────────────────────
-    def list_vms(self) -> list[dict]:
-        """Liste toutes les VMs (actives et inactives) avec leurs infos de base."""
-        conn = self._connect()
+    def _bulk_vms(self, conn: libvirt.virConnect) -> list[VMInfo] | None:
+        """
+        Toutes les VMs (actives puis inactives) : depuis l'état en mémoire,
+        sinon en un seul appel getAllDomainStats qui le réalimente.
+        Retourne None si l'API groupée n'est pas disponible.
+        """
+        vms = self._state_snapshot()
+        if vms is not None:
+            return vms
+
+        gen = self._state_gen
         try:
-            vms = []
-            # VMs actives (en cours d'exécution)
-            for dom_id in conn.listDomainsID():
-                try:
-                    dom = conn.lookupByID(dom_id)
-                    vms.append(self._vm_basic_info(dom))
-                except libvirt.libvirtError as e:
-                    logger.warning("Erreur lecture VM id=%s : %s", dom_id, e)
+            vms = self._sort_vms(
+                [self._vm_info_from_stats(dom, stats) for dom, stats in self._bulk_stats(conn)]
+            )
+        except (AttributeError, libvirt.libvirtError) as e:
+            logger.info("getAllDomainStats indisponible (%s) — repli VM par VM", e)
+            return None
+        self._publish_state(vms, gen)
+        return vms
+
+    def iter_vms(self) -> Iterator[VMInfo]:
+        """
+        Itère sur toutes les VMs (actives puis inactives).
+        Chemin nominal : état en mémoire, tenu à jour par les événements
+        libvirt et l'échantillonneur ; sinon un seul appel getAllDomainStats
+        pour toutes les VMs, qui réalimente cet état.
+        Repli (libvirt trop ancien) : énumération faite immédiatement (les
+        erreurs de connexion sont levées ici, pas à la première itération),
+        puis chaque VM est lue avec une connexion empruntée et rendue avant
+        d'être produite, plusieurs VMs en parallèle.
+        """
+        vms = self._state_snapshot()
+        if vms is not None:
+            return iter(vms)
+
+        with self._conn() as conn:
+            vms = self._bulk_vms(conn)
+            if vms is not None:
+                return iter(vms)
+            names = [dom.name() for dom in self._all_domains(conn)]
+        return self._iter_vms(names)
+
+    def _iter_vms(self, names: list[str]) -> Iterator[VMInfo]:
+        """
+        Lit chaque VM sur sa propre connexion empruntée ; en parallèle sur
+        l'exécuteur I/O (un thread par VM, borné par le pool), dans l'ordre.
+        """
+        if len(names) > 1:
+            results = self._io_pool.map(self._fetch_one, names)
+        else:
+            results = map(self._fetch_one, names)
+        return (info for info in results if info is not None)
+
+    def _fetch_one(self, name: str) -> VMInfo | None:
+        """Infos de base d'une VM, None si elle a disparu entre-temps."""
+        with self._conn() as conn:
+            try:
+                return self._vm_basic_info(conn.lookupByName(name))
+            except libvirt.libvirtError as e:
+                logger.warning("Erreur lecture VM '%s' : %s", name, e)
+                return None
+
+    def _list_vms(self, conn: libvirt.virConnect) -> list[VMInfo]:
+        """Comme list_vms, sur une connexion déjà empruntée par l'appelant."""
+        vms = self._bulk_vms(conn)
+        if vms is not None:
+            return vms
+
+        vms = []
+        for dom in self._all_domains(conn):
+            try:
+                vms.append(self._vm_basic_info(dom))
+            except libvirt.libvirtError as e:
+                logger.warning("Erreur lecture VM '%s' : %s", dom.name(), e)
+        return vms
+
+    def _list_vms_summary(self, conn: libvirt.virConnect) -> list[VMSummary]:
+        """
+        Nom, UUID et état de chaque VM, sans XML ni dom.info() : depuis l'état
+        en mémoire, sinon un seul getAllDomainStats limité au groupe STATE.
+        Repli (libvirt trop ancien) : dom.state() par domaine, toujours sans XML.
+        """
+        vms = self._state_snapshot()
+        if vms is not None:
+            return [VMSummary(vm.name, vm.uuid, vm.state) for vm in vms]
 
-            # VMs définies mais arrêtées
-            for name in conn.listDefinedDomains():
+        try:
+            records = [
+                (dom, stats.get("state.state", libvirt.VIR_DOMAIN_NOSTATE))
+                for dom, stats in conn.getAllDomainStats(libvirt.VIR_DOMAIN_STATS_STATE, 0)
+            ]
+        except (AttributeError, libvirt.libvirtError) as e:
+            logger.info("getAllDomainStats indisponible (%s) — repli VM par VM", e)
+            records = []
+            for dom in self._all_domains(conn):
                 try:
-                    dom = conn.lookupByName(name)
-                    vms.append(self._vm_basic_info(dom))
-                except libvirt.libvirtError as e:
-                    logger.warning("Erreur lecture VM '%s' : %s", name, e)
+                    records.append((dom, dom.state()[0]))
+                except libvirt.libvirtError as err:
+                    logger.warning("Erreur lecture VM '%s' : %s", dom.name(), err)
+        return [
+            VMSummary(dom.name(), dom.UUIDString(), _state_name(state_id))
+            for dom, state_id in records
+        ]
 
-            logger.info("Liste des VMs récupérée : %d VM(s)", len(vms))
-            return vms
-        finally:
-            conn.close()
+    @staticmethod
+    def _all_domains(conn: libvirt.virConnect, flags: int = 0) -> list[libvirt.virDomain]:
+        """
+        Domaines (actifs d'abord) en un seul RPC listAllDomains ; dom.ID()
+        et dom.name() sont lus côté client, sans aller-retour. Repli sur
+        listDomainsID/listDefinedDomains + lookup pour un libvirt très ancien.
+        """
+        try:
+            doms = conn.listAllDomains(flags)
+        except (AttributeError, libvirt.libvirtError):
+            doms = []
+            if flags != libvirt.VIR_CONNECT_LIST_DOMAINS_INACTIVE:
+                for dom_id in conn.listDomainsID():
+                    try:
+                        doms.append(conn.lookupByID(dom_id))
+                    except libvirt.libvirtError as e:
+                        logger.warning("Erreur lecture VM id=%s : %s", dom_id, e)
+            if flags != libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE:
+                for name in conn.listDefinedDomains():
+                    try:
+                        doms.append(conn.lookupByName(name))
+                    except libvirt.libvirtError as e:
+                        logger.warning("Erreur lecture VM '%s' : %s", name, e)
+        doms.sort(key=lambda dom: dom.ID() == -1)
+        return doms
+
+    def list_vms(self) -> list[VMInfo]:
+        """Liste toutes les VMs (actives et inactives) avec leurs infos de base."""
+        vms = self._state_snapshot()
+        if vms is None:
+            vms = list(self.iter_vms())
+        logger.info("Liste des VMs récupérée : %d VM(s)", len(vms))
+        return vms
 
     # ──────────────────────────────────────────
     # DÉTAILS D'UNE VM
     # ──────────────────────────────────────────
     def vm_details(self, name: str) -> dict:
         """Retourne les détails complets d'une VM spécifique."""
-        conn = self._connect()
-        try:
+        with self._conn() as conn:
             dom = self._get_domain(conn, name)
-            info = self._vm_basic_info(dom)
-            root = self._parse_xml(dom)
+            xml = self._parsed_xml(dom)
+            root = xml.root
+            info = asdict(self._vm_basic_info(dom, xml))
 
             # Ajout d'infos supplémentaires : Disques détaillés
-            info["disks"] = self._get_disks_info(dom, conn)
-            
+            info["disks"] = self._get_disks_info(dom, conn, info["is_active"], root)
+        
             # Interfaces réseau
-            info["network_interfaces"] = self._get_network_interfaces(root)
+            info["network_interfaces"] = list(xml.iface_names)
 
             # OS info
-            os_type_elem = root.find(".//os/type")
-            info["os_type"] = os_type_elem.text if os_type_elem is not None else "unknown"
+            info["os_type"] = xml.os_type
 
             # Autostart
             try:
@@ -273,35 +1272,32 @@ class LibvirtManager:
             info["is_persistent"] = dom.isPersistent() == 1
 
             # Console VNC info (optionnel, pour debug)
-            graphics = root.find(".//graphics[@type='vnc']")
-            if graphics is not None:
-                info["vnc_port"] = graphics.get("port")
+            vnc_port = self._get_vnc_port(root)
+            if vnc_port is not None:
+                info["vnc_port"] = vnc_port
 
             logger.info("Détails récupérés pour la VM '%s'", name)
             return info
-        finally:
-            conn.close()
 
     # ──────────────────────────────────────────
     # ACTIONS : start / stop / restart
     # ──────────────────────────────────────────
     def start_vm(self, name: str) -> dict:
         """Démarre une VM. Retourne un dict de statut."""
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, name)
-            if dom.isActive():
-                return {"status": "already_running", "name": name,
-                        "message": f"La VM '{name}' est déjà en cours d'exécution."}
-            dom.create()
-            logger.info("VM '%s' démarrée avec succès", name)
-            return {"status": "started", "name": name,
-                    "message": f"La VM '{name}' a été démarrée."}
-        except libvirt.libvirtError as e:
-            logger.error("Échec démarrage VM '%s' : %s", name, e)
-            raise LibvirtError(f"Impossible de démarrer la VM '{name}' : {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, name)
+                if dom.isActive():
+                    return {"status": "already_running", "name": name,
+                            "message": f"La VM '{name}' est déjà en cours d'exécution."}
+                self._with_timeout(dom.create, timeout=ACTION_TIMEOUT)
+                self._mark_state_dirty()
+                logger.info("VM '%s' démarrée avec succès", name)
+                return {"status": "started", "name": name,
+                        "message": f"La VM '{name}' a été démarrée."}
+            except libvirt.libvirtError as e:
+                logger.error("Échec démarrage VM '%s' : %s", name, e)
+                raise LibvirtError(f"Impossible de démarrer la VM '{name}' : {e}")
 
     def stop_vm(self, name: str, force: bool = False) -> dict:
         """
@@ -309,27 +1305,27 @@ class LibvirtManager:
         - force=False : arrêt gracieux (ACPI shutdown)
         - force=True  : arrêt brutal (destroy)
         """
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, name)
-            if not dom.isActive():
-                return {"status": "already_stopped", "name": name,
-                        "message": f"La VM '{name}' est déjà arrêtée."}
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, name)
+                if not dom.isActive():
+                    return {"status": "already_stopped", "name": name,
+                            "message": f"La VM '{name}' est déjà arrêtée."}
 
-            if force:
-                dom.destroy()
-                logger.info("VM '%s' arrêtée de force (destroy)", name)
-            else:
-                dom.shutdown()
-                logger.info("VM '%s' arrêt gracieux demandé", name)
+                if force:
+                    self._with_timeout(dom.destroy, timeout=ACTION_TIMEOUT)
+                    self._mark_state_dirty()
+                    logger.info("VM '%s' arrêtée de force (destroy)", name)
+                else:
+                    self._with_timeout(dom.shutdown, timeout=ACTION_TIMEOUT)
+                    self._mark_state_dirty()
+                    logger.info("VM '%s' arrêt gracieux demandé", name)
 
-            return {"status": "stopped", "name": name,
-                    "message": f"La VM '{name}' a été arrêtée{' (force)' if force else ''}."}
-        except libvirt.libvirtError as e:
-            logger.error("Échec arrêt VM '%s' : %s", name, e)
-            raise LibvirtError(f"Impossible d'arrêter la VM '{name}' : {e}")
-        finally:
-            conn.close()
+                return {"status": "stopped", "name": name,
+                        "message": f"La VM '{name}' a été arrêtée{' (force)' if force else ''}."}
+            except libvirt.libvirtError as e:
+                logger.error("Échec arrêt VM '%s' : %s", name, e)
+                raise LibvirtError(f"Impossible d'arrêter la VM '{name}' : {e}")
 
     def restart_vm(self, name: str, force: bool = False) -> dict:
         """
@@ -337,38 +1333,40 @@ class LibvirtManager:
         - force=False : reboot gracieux (ACPI)
         - force=True  : reset brutal (reset physique)
         """
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, name)
-            if dom.isActive():
-                if force:
-                    try:
-                        dom.reset(0)
-                        logger.info("VM '%s' réinitialisée (reset)", name)
-                        return {"status": "reset", "name": name,
-                                "message": f"La VM '{name}' a été réinitialisée physiquement."}
-                    except libvirt.libvirtError:
-                        # Fallback si reset n'est pas supporté (ex: certaines configs QEMU)
-                        logger.warning("Reset non supporté pour '%s', fallback sur destroy+create", name)
-                        dom.destroy()
-                        dom.create()
-                        return {"status": "restarted_hard", "name": name,
-                                "message": f"La VM '{name}' a été redémarrée de force."}
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, name)
+                if dom.isActive():
+                    if force:
+                        try:
+                            self._with_timeout(dom.reset, 0, timeout=ACTION_TIMEOUT)
+                            self._mark_state_dirty()
+                            logger.info("VM '%s' réinitialisée (reset)", name)
+                            return {"status": "reset", "name": name,
+                                    "message": f"La VM '{name}' a été réinitialisée physiquement."}
+                        except libvirt.libvirtError:
+                            # Fallback si reset n'est pas supporté (ex: certaines configs QEMU)
+                            logger.warning("Reset non supporté pour '%s', fallback sur destroy+create", name)
+                            self._with_timeout(dom.destroy, timeout=ACTION_TIMEOUT)
+                            self._with_timeout(dom.create, timeout=ACTION_TIMEOUT)
+                            self._mark_state_dirty()
+                            return {"status": "restarted_hard", "name": name,
+                                    "message": f"La VM '{name}' a été redémarrée de force."}
+                    else:
+                        self._with_timeout(dom.reboot, 0, timeout=ACTION_TIMEOUT)
+                        self._mark_state_dirty()
+                        logger.info("VM '%s' redémarrée (reboot)", name)
+                        return {"status": "restarted", "name": name,
+                                "message": f"La VM '{name}' a été redémarrée."}
                 else:
-                    dom.reboot(0)
-                    logger.info("VM '%s' redémarrée (reboot)", name)
-                    return {"status": "restarted", "name": name,
-                            "message": f"La VM '{name}' a été redémarrée."}
-            else:
-                dom.create()
-                logger.info("VM '%s' était arrêtée — démarrage", name)
-                return {"status": "started", "name": name,
-                        "message": f"La VM '{name}' était arrêtée, elle a été démarrée."}
-        except libvirt.libvirtError as e:
-            logger.error("Échec redémarrage VM '%s' : %s", name, e)
-            raise LibvirtError(f"Impossible de redémarrer la VM '{name}' : {e}")
-        finally:
-            conn.close()
+                    self._with_timeout(dom.create, timeout=ACTION_TIMEOUT)
+                    self._mark_state_dirty()
+                    logger.info("VM '%s' était arrêtée — démarrage", name)
+                    return {"status": "started", "name": name,
+                            "message": f"La VM '{name}' était arrêtée, elle a été démarrée."}
+            except libvirt.libvirtError as e:
+                logger.error("Échec redémarrage VM '%s' : %s", name, e)
+                raise LibvirtError(f"Impossible de redémarrer la VM '{name}' : {e}")
 
     # ──────────────────────────────────────────
     # MÉTRIQUES EN TEMPS RÉEL
@@ -381,185 +1379,447 @@ class LibvirtManager:
         - I/O disque (lecture / écriture en octets)
         - Réseau   (rx / tx en octets)
         """
-        conn = self._connect()
-        try:
+        cached = self._sampled_metrics()
+        if cached is not None and name in cached:
+            return dict(cached[name])
+
+        with self._conn() as conn:
             dom = self._get_domain(conn, name)
+            # Domaine inactif : id -1, connu côté client sans RPC
+            if dom.ID() == -1:
+                return self._stopped_metrics(name)
+
+            # ── Tout en un seul RPC groupé ────────
+            stats = self._domain_stats(conn, dom, BULK_STATS_FLAGS)
+            if stats is not None:
+                if not _is_active_state(stats.get("state.state", libvirt.VIR_DOMAIN_NOSTATE)):
+                    return self._stopped_metrics(name)
+                metrics = self._metrics_from_stats(dom, name, dom.UUIDString(), stats)
+                logger.debug("Métriques VM '%s' : %s", name, metrics)
+                return metrics
+
+            # ── Repli (libvirt sans stats groupées) ──
+            info = self._with_timeout(dom.info)
+            state_id, max_mem_kib, mem_kib, vcpus, cpu_time = info
+            if not _is_active_state(state_id):
+                return self._stopped_metrics(name)
+
+            xml = self._parsed_xml(dom)
+            cpu_percent = self._compute_cpu_percent(dom, info)
+
+            # Stats mémoire plus précises
+            try:
+                actual_used = dom.memoryStats().get("rss", mem_kib)  # Resident Set Size
+            except libvirt.libvirtError:
+                actual_used = mem_kib
 
-            if not dom.isActive():
-                return {
-                    "name": name,
-                    "state": "stopped",
-                    "message": "Les métriques ne sont disponibles que pour les VMs en cours d'exécution.",
-                    "cpu_percent": 0,
-                    "memory_percent": 0,
-                    "memory_used_mb": 0,
-                    "memory_total_mb": 0,
-                    "disk_io": [],
-                    "network_io": [],
-                }
+            memory_percent = round((actual_used / max_mem_kib) * 100, 2) if max_mem_kib > 0 else 0
 
-            # ── CPU % ─────────────────────────────
-            cpu_percent = self._compute_cpu_percent(dom, conn)
+            # ── Disque / Réseau ───────────────────
+            uuid = dom.UUIDString()
+            jobs = [(self._block_stats_entry, dev) for dev in xml.disk_targets]
+            jobs += [(self._iface_stats_entry, iface) for iface in xml.iface_names]
+            fan_out = len(jobs) > 1
+            if not fan_out:
+                results = [fn(dom, dev) for fn, dev in jobs]
+
+        # Plusieurs périphériques : un RPC par périphérique, en parallèle, chacun
+        # sur sa propre connexion (libvirt sérialise les appels d'une même
+        # connexion). La connexion de l'appelant est rendue avant pour ne pas
+        # épuiser le pool.
+        if fan_out:
+            results = list(self._io_pool.map(lambda job: self._device_stats(uuid, *job), jobs))
+
+        disk_io = [r for r in results[:len(xml.disk_targets)] if r is not None]
+        network_io = [r for r in results[len(xml.disk_targets):] if r is not None]
+        self._add_io_rates(uuid, disk_io, network_io)
+
+        metrics = {
+            "name": name,
+            "state": _state_name(state_id),
+            "cpu_percent": cpu_percent,
+            "cpu_accurate": self._cpu_accurate(uuid),
+            "vcpus": vcpus,
+            "memory_percent": memory_percent,
+            "memory_used_mb": round(actual_used / 1024),
+            "memory_total_mb": round(max_mem_kib / 1024),
+            "disk_io": disk_io,
+            "network_io": network_io,
+        }
+
+        logger.debug("Métriques VM '%s' : %s", name, metrics)
+        return metrics
 
-            # ── RAM ───────────────────────────────
-            state_id, max_mem_kib, mem_kib, vcpus, cpu_time = dom.info()
+    @staticmethod
+    def _stopped_metrics(name: str) -> dict:
+        """Réponse de vm_metrics pour une VM arrêtée."""
+        return {
+            "name": name,
+            "state": "stopped",
+            "message": "Les métriques ne sont disponibles que pour les VMs en cours d'exécution.",
+            "cpu_percent": 0,
+            "cpu_accurate": True,
+            "memory_percent": 0,
+            "memory_used_mb": 0,
+            "memory_total_mb": 0,
+            "disk_io": [],
+            "network_io": [],
+        }
 
-            # Tenter d'obtenir les stats mémoire plus précises
+    def _domain_stats(self, conn: libvirt.virConnect, dom: libvirt.virDomain,
+                      flags: int) -> dict | None:
+        """
+        Enregistrement de statistiques groupées d'une seule VM, ou None si
+        domainListGetStats n'est pas disponible (libvirt trop ancien).
+        """
+        try:
+            records = self._with_timeout(conn.domainListGetStats, [dom], flags, key=dom.UUIDString())
+        except (AttributeError, libvirt.libvirtError) as e:
+            logger.debug("domainListGetStats indisponible (%s) — repli RPC par RPC", e)
+            return None
+        return records[0][1] if records else None
+
+    def _device_stats(self, uuid: str, fn, dev: str) -> dict | None:
+        """Exécute fn(dom, dev) sur une connexion empruntée (tâche de l'exécuteur)."""
+        with self._conn() as conn:
             try:
-                mem_stats = dom.memoryStats()
-                actual_used = mem_stats.get("rss", mem_kib)  # Resident Set Size
-                available = mem_stats.get("available", max_mem_kib)
-                used_for_percent = mem_stats.get("actual", mem_kib)
-            except libvirt.libvirtError:
-                actual_used = mem_kib
-                available = max_mem_kib
-                used_for_percent = mem_kib
+                dom = conn.lookupByUUIDString(uuid)
+            except libvirt.libvirtError as e:
+                logger.warning("VM %s introuvable pour %s : %s", uuid, dev, e)
+                return None
+            return fn(dom, dev)
+
+    def _block_stats_entry(self, dom: libvirt.virDomain, dev: str) -> dict | None:
+        """Compteurs I/O d'un disque, ou None si libvirt échoue."""
+        try:
+            rd_req, rd_bytes, wr_req, wr_bytes, errs = self._with_timeout(dom.blockStats, dev)
+        except libvirt.libvirtError as e:
+            logger.warning("blockStats(%s) échoué : %s", dev, e)
+            return None
+        return {
+            "device": dev,
+            "read_bytes": rd_bytes,
+            "write_bytes": wr_bytes,
+            "read_requests": rd_req,
+            "write_requests": wr_req,
+            "errors": errs,
+        }
 
-            memory_percent = round((actual_used / max_mem_kib) * 100, 2) if max_mem_kib > 0 else 0
+    def _iface_stats_entry(self, dom: libvirt.virDomain, iface: str) -> dict | None:
+        """Compteurs d'une interface réseau, ou None si libvirt échoue."""
+        try:
+            stats = self._with_timeout(dom.interfaceStats, iface)
+        except libvirt.libvirtError as e:
+            logger.warning("interfaceStats(%s) échoué : %s", iface, e)
+            return None
+        # stats: (rx_bytes, rx_packets, rx_errs, rx_drop,
+        #         tx_bytes, tx_packets, tx_errs, tx_drop)
+        return {
+            "interface": iface,
+            "rx_bytes": stats[0],
+            "rx_packets": stats[1],
+            "rx_errors": stats[2],
+            "rx_drops": stats[3],
+            "tx_bytes": stats[4],
+            "tx_packets": stats[5],
+            "tx_errors": stats[6],
+            "tx_drops": stats[7],
+        }
 
-            # ── Disque ────────────────────────────
-            root = self._parse_xml(dom)
-            disk_io = []
-            for dev in self._get_disk_targets(root):
-                try:
-                    rd_req, rd_bytes, wr_req, wr_bytes, errs = dom.blockStats(dev)
-                    disk_io.append({
-                        "device": dev,
-                        "read_bytes": rd_bytes,
-                        "write_bytes": wr_bytes,
-                        "read_requests": rd_req,
-                        "write_requests": wr_req,
-                        "errors": errs,
-                    })
-                except libvirt.libvirtError as e:
-                    logger.warning("blockStats(%s) échoué : %s", dev, e)
-
-            # ── Réseau ────────────────────────────
-            network_io = []
-            for iface in self._get_network_interfaces(root):
-                try:
-                    stats = dom.interfaceStats(iface)
-                    # stats: (rx_bytes, rx_packets, rx_errs, rx_drop,
-                    #         tx_bytes, tx_packets, tx_errs, tx_drop)
-                    network_io.append({
-                        "interface": iface,
-                        "rx_bytes": stats[0],
-                        "rx_packets": stats[1],
-                        "rx_errors": stats[2],
-                        "rx_drops": stats[3],
-                        "tx_bytes": stats[4],
-                        "tx_packets": stats[5],
-                        "tx_errors": stats[6],
-                        "tx_drops": stats[7],
-                    })
-                except libvirt.libvirtError as e:
-                    logger.warning("interfaceStats(%s) échoué : %s", iface, e)
-
-            metrics = {
-                "name": name,
-                "state": VM_STATE_MAP.get(state_id, "unknown"),
-                "cpu_percent": cpu_percent,
-                "vcpus": vcpus,
-                "memory_percent": memory_percent,
-                "memory_used_mb": round(actual_used / 1024),
-                "memory_total_mb": round(max_mem_kib / 1024),
-                "disk_io": disk_io,
-                "network_io": network_io,
-            }
-
-            logger.debug("Métriques VM '%s' : %s", name, metrics)
-            return metrics
-        finally:
-            conn.close()
+    def all_vm_metrics(self) -> list[dict]:
+        """
+        Récupère les métriques de toutes les VMs actives en un seul appel
+        RPC (virConnectGetAllDomainStats). Si l'API n'est pas disponible
+        (libvirt trop ancien), repli sur vm_metrics() VM par VM.
+        Sans RPC si l'échantillonneur a publié des métriques récentes.
+        """
+        cached = self._sampled_metrics()
+        if cached is not None:
+            return [dict(m) for m in cached.values()]
 
-    def _compute_cpu_percent(self, dom: libvirt.virDomain, conn: libvirt.virConnect) -> float:
+        with self._conn() as conn:
+            try:
+                records = conn.getAllDomainStats(
+                    BULK_STATS_FLAGS, libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE
+                )
+                return [self._metrics_from_stats(dom, dom.name(), dom.UUIDString(), stats)
+                        for dom, stats in records]
+            except (AttributeError, libvirt.libvirtError) as e:
+                logger.info("getAllDomainStats indisponible (%s) — repli VM par VM", e)
+            names = [
+                dom.name() for dom in self._all_domains(conn, libvirt.VIR_CONNECT_LIST_DOMAINS_ACTIVE)
+            ]
+
+        metrics = []
+        for name in names:
+            try:
+                metrics.append(self.vm_metrics(name))
+            except LibvirtError as e:
+                logger.warning("Métriques VM '%s' indisponibles : %s", name, e)
+        return metrics
+
+    def _metrics_from_stats(self, dom: libvirt.virDomain, name: str, uuid: str, stats: dict) -> dict:
         """
-        Calcule le % CPU en prenant deux mesures espacées de ~1 seconde.
-        Utilise un cache pour éviter de bloquer trop longtemps.
+        Construit le dict de métriques (format vm_metrics) depuis un
+        enregistrement getAllDomainStats. Les stats groupées couvrent aussi
+        cdrom et disquette : si l'XML du domaine est en cache, seuls ses
+        disques (device='disk') sont gardés, comme dans le repli.
         """
-        name = dom.name()
+        state_id = stats.get("state.state", libvirt.VIR_DOMAIN_NOSTATE)
+        max_mem_kib = stats.get("balloon.maximum", 0)
+        mem_kib = stats.get("balloon.current", 0)
+        actual_used = stats.get("balloon.rss", mem_kib)
+        vcpus = stats.get("vcpu.current", 0)
+
+        cpu_percent = self._cpu_percent_from_sample(uuid, stats.get("cpu.time", 0), vcpus)
+        memory_percent = round((actual_used / max_mem_kib) * 100, 2) if max_mem_kib > 0 else 0
+
+        xml = self._cached_xml(dom)
+        disk_io = []
+        for i in range(stats.get("block.count", 0)):
+            p = f"block.{i}."
+            if xml is not None and stats.get(p + "name") not in xml.disk_targets:
+                continue
+            disk_io.append({
+                "device": stats.get(p + "name"),
+                "read_bytes": stats.get(p + "rd.bytes", 0),
+                "write_bytes": stats.get(p + "wr.bytes", 0),
+                "read_requests": stats.get(p + "rd.reqs", 0),
+                "write_requests": stats.get(p + "wr.reqs", 0),
+                # Fourni par Xen seulement ; -1 comme blockStats sous QEMU
+                "errors": stats.get(p + "errors", -1),
+            })
 
-        # Première mesure (ou réutilisation du cache)
-        now = time.time()
-        prev = self._cpu_cache.get(name)
+        network_io = []
+        for i in range(stats.get("net.count", 0)):
+            p = f"net.{i}."
+            network_io.append({
+                "interface": stats.get(p + "name"),
+                "rx_bytes": stats.get(p + "rx.bytes", 0),
+                "rx_packets": stats.get(p + "rx.pkts", 0),
+                "rx_errors": stats.get(p + "rx.errs", 0),
+                "rx_drops": stats.get(p + "rx.drop", 0),
+                "tx_bytes": stats.get(p + "tx.bytes", 0),
+                "tx_packets": stats.get(p + "tx.pkts", 0),
+                "tx_errors": stats.get(p + "tx.errs", 0),
+                "tx_drops": stats.get(p + "tx.drop", 0),
+            })
+        self._add_io_rates(uuid, disk_io, network_io)
 
-        info1 = dom.info()
-        cpu_time_1 = info1[4]
-        timestamp_1 = now
+        return {
+            "name": name,
+            "state": _state_name(state_id),
+            "cpu_percent": cpu_percent,
+            "cpu_accurate": self._cpu_accurate(uuid),
+            "vcpus": vcpus,
+            "memory_percent": memory_percent,
+            "memory_used_mb": round(actual_used / 1024),
+            "memory_total_mb": round(max_mem_kib / 1024),
+            "disk_io": disk_io,
+            "network_io": network_io,
+        }
 
-        if prev and (now - prev["timestamp"]) < 5:
-            # Utiliser les données en cache comme « point de départ »
-            cpu_time_0 = prev["cpu_time"]
-            timestamp_0 = prev["timestamp"]
-        else:
-            # Pas de cache récent → on prend deux mesures
-            cpu_time_0 = cpu_time_1
-            timestamp_0 = timestamp_1
-            time.sleep(1)
-            info2 = dom.info()
-            cpu_time_1 = info2[4]
-            timestamp_1 = time.time()
+    def _io_rates(self, key: tuple, a: int, b: int) -> tuple[float, float]:
+        """
+        Débits (octets/s) de deux compteurs cumulés, par différence avec
+        l'échantillon précédent de `key` ; même fenêtre minimale que le CPU %.
+        Un compteur qui recule (VM redémarrée) donne 0.
+        """
+        now = time.monotonic()
+        prev = self._io_cache.get(key)
+        if prev and 0 <= now - prev[0] < CPU_MIN_WINDOW:
+            return prev[3], prev[4]
+
+        rate_a = rate_b = 0.0
+        if prev:
+            dt = now - prev[0]
+            if dt > 0:
+                rate_a = round(max(0, a - prev[1]) / dt, 1)
+                rate_b = round(max(0, b - prev[2]) / dt, 1)
+
+        self._io_cache[key] = (now, a, b, rate_a, rate_b)
+        return rate_a, rate_b
+
+    def _add_io_rates(self, uuid: str, disk_io: list[dict], network_io: list[dict]) -> None:
+        """Ajoute read_bps/write_bps et rx_bps/tx_bps à côté des compteurs bruts."""
+        for d in disk_io:
+            d["read_bps"], d["write_bps"] = self._io_rates(
+                (uuid, "disk", d["device"]), d["read_bytes"], d["write_bytes"]
+            )
+        for n in network_io:
+            n["rx_bps"], n["tx_bps"] = self._io_rates(
+                (uuid, "net", n["interface"]), n["rx_bytes"], n["tx_bytes"]
+            )
+
+    def _cpu_percent_from_sample(self, uuid: str, cpu_time: int, num_cpus: int) -> float:
+        """
+        Calcule le % CPU par rapport à l'échantillon précédent en cache,
+        sans attente. Retourne 0.0 pour le tout premier échantillon, marqué
+        non fiable (voir _cpu_accurate).
+        Un échantillon trop proche du précédent (< CPU_MIN_WINDOW) ne le
+        remplace pas : on renvoie le dernier % calculé plutôt qu'une
+        valeur bruitée sur une fenêtre de quelques millisecondes.
+        """
+        now = time.monotonic()
+        prev = self._cpu_cache.get(uuid)
+        if prev and 0 <= now - prev["timestamp"] < CPU_MIN_WINDOW:
+            return prev["cpu_percent"]
+
+        cpu_percent = 0.0
+        accurate = False
+        if prev:
+            dt = now - prev["timestamp"]
+            if dt > 0:
+                # cpu_time est en nanosecondes
+                raw = ((cpu_time - prev["cpu_time"]) / (dt * (num_cpus or 1) * 1e9)) * 100
+                cpu_percent = round(max(0.0, min(raw, 100.0)), 2)
+                accurate = True
+
+        self._cpu_cache[uuid] = {
+            "cpu_time": cpu_time, "timestamp": now, "cpu_percent": cpu_percent, "accurate": accurate,
+        }
+        return cpu_percent
 
-        # Mettre à jour le cache
-        self._cpu_cache[name] = {"cpu_time": cpu_time_1, "timestamp": timestamp_1}
+    def _cpu_accurate(self, uuid: str) -> bool:
+        """Faux tant qu'aucun second échantillon n'a permis de calculer le % CPU."""
+        entry = self._cpu_cache.get(uuid)
+        return bool(entry and entry["accurate"])
 
-        # Calcul du pourcentage
-        dt = timestamp_1 - timestamp_0
-        if dt <= 0:
-            return 0.0
+    def _compute_cpu_percent(self, dom: libvirt.virDomain, info: tuple) -> float:
+        """
+        Calcule le % CPU par différence avec l'échantillon en cache (tenu à
+        jour par l'échantillonneur d'arrière-plan), sans jamais bloquer :
+        temps CPU et vCPUs viennent du tuple dom.info() déjà lu par
+        l'appelant, aucun RPC.
+        """
+        return self._cpu_percent_from_sample(dom.UUIDString(), info[4], info[3])
 
-        num_cpus = dom.info()[3] or 1
-        # cpu_time est en nanosecondes
-        cpu_percent = ((cpu_time_1 - cpu_time_0) / (dt * num_cpus * 1e9)) * 100
-        return round(max(0.0, min(cpu_percent, 100.0)), 2)
+    # ──────────────────────────────────────────
+    # ÉCHANTILLONNEUR CPU (arrière-plan)
+    # ──────────────────────────────────────────
+    def start_cpu_sampler(self, interval: float = 2.0) -> None:
+        """
+        Démarre un thread qui, toutes les `interval` secondes, relève en
+        deux appels groupés les métriques des VMs actives (CPU %, RAM,
+        disques, réseau) et l'état de toutes les VMs. vm_metrics() et
+        all_vm_metrics() servent alors ces relevés sans RPC.
+        Thread natif, même sous eventlet : getAllDomainStats bloque dans le
+        code C et gèlerait le hub s'il tournait dans un green thread.
+        """
+        self._sample_interval = interval
+        thread = _native_thread_class()(
+            target=self._sampler_loop, args=(interval,), name="cpu-sampler", daemon=True
+        )
+        thread.start()
+
+    def _sampler_loop(self, interval: float) -> None:
+        while True:
+            try:
+                self._sample()
+            except (AttributeError, LibvirtError, libvirt.libvirtError) as e:
+                logger.warning("Échantillonnage échoué : %s", e)
+            except Exception:
+                # Thread unique et jamais relancé : aucune erreur ne doit l'arrêter
+                logger.exception("Erreur inattendue dans l'échantillonneur")
+            time.sleep(interval)
+
+    def _sample(self) -> None:
+        gen = self._state_gen
+        with self._conn() as conn:
+            # Métriques complètes pour les seules VMs actives : les stats
+            # disque d'une VM éteinte obligeraient libvirt à sonder ses images
+            active = conn.getAllDomainStats(
+                BULK_STATS_FLAGS, libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE
+            )
+            inactive = conn.getAllDomainStats(
+                LIST_STATS_FLAGS, libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_INACTIVE
+            )
+            vms = [self._vm_info_from_stats(dom, stats) for dom, stats in active + inactive]
+
+        metrics = {}
+        running = set()
+        for vm, (dom, stats) in zip(vms, active):
+            metrics[vm.name] = self._metrics_from_stats(dom, vm.name, vm.uuid, stats)
+            running.add(vm.uuid)
+        self._metrics_cache = metrics
+        # Comme pour l'état : un événement survenu pendant le relevé le périme
+        self._metrics_at = time.monotonic() if gen == self._state_gen else 0.0
+        self._publish_state(vms, gen)
+
+        # Oublier les VMs qui ne tournent plus
+        for uuid in list(self._cpu_cache):
+            if uuid not in running:
+                self._cpu_cache.pop(uuid, None)
+        for key in list(self._io_cache):
+            if key[0] not in running:
+                self._io_cache.pop(key, None)
+
+    def _sampled_metrics(self) -> dict[str, dict] | None:
+        """Métriques publiées par l'échantillonneur, ou None si absentes ou trop anciennes."""
+        if self._sample_interval is None:
+            return None
+        if time.monotonic() - self._metrics_at > 2 * self._sample_interval + CPU_MIN_WINDOW:
+            return None
+        return self._metrics_cache
 
     # ──────────────────────────────────────────
     # STATS GLOBALES (dashboard)
     # ──────────────────────────────────────────
-    def global_stats(self) -> dict:
+    def global_stats(self, include_vms: bool = True) -> dict:
         """
         Retourne un résumé global de l'hyperviseur :
         - Nombre de VMs (actives / total)
         - Info hôte (hostname, RAM totale, CPUs)
         - Répartition des états
+        - Liste détaillée des VMs, sauf si include_vms est faux : seuls les
+          compteurs sont alors calculés, via le chemin léger _list_vms_summary
         """
-        conn = self._connect()
-        try:
-            # Infos hyperviseur
-            hostname = conn.getHostname()
-            node_info = conn.getInfo()
-            # node_info: [model, mem_mb, cpus, mhz, nodes, sockets, cores, threads]
-            host_info = {
-                "hostname": hostname,
-                "cpu_model": node_info[0],
-                "memory_total_mb": node_info[1],
-                "cpus": node_info[2],
-                "cpu_frequency_mhz": node_info[3],
-                "libvirt_version": self._format_version(conn.getLibVersion()),
-                "hypervisor_type": conn.getType(),
-            }
-
-            # Comptage des VMs
-            all_vms = self.list_vms()
-            total = len(all_vms)
-            active = sum(1 for vm in all_vms if vm["is_active"])
-
-            # Répartition par état
-            state_counts: dict[str, int] = {}
-            for vm in all_vms:
-                s = vm["state"]
-                state_counts[s] = state_counts.get(s, 0) + 1
-
-            return {
-                "host": host_info,
-                "vms_total": total,
-                "vms_active": active,
-                "vms_inactive": total - active,
-                "state_distribution": state_counts,
-                "vms": all_vms,
-            }
-        finally:
-            conn.close()
+        # Infos hyperviseur (relues au plus une fois par heure) et VMs en
+        # mémoire : aucun RPC quand les deux sont disponibles
+        all_vms = self._state_snapshot()
+        host_stale = (
+            self._host_info is None
+            or time.monotonic() - self._host_info_at > HOST_INFO_TTL
+        )
+        if host_stale or all_vms is None:
+            with self._conn() as conn:
+                if host_stale:
+                    self._host_info = self._read_host_info(conn)
+                    self._host_info_at = time.monotonic()
+                # Comptage des VMs, sur la même connexion
+                if all_vms is None:
+                    all_vms = self._list_vms(conn) if include_vms else self._list_vms_summary(conn)
+        host_info = self._host_info
+        total = len(all_vms)
+
+        # Répartition par état ; un domaine inactif est toujours « stopped »
+        state_counts = Counter(vm.state for vm in all_vms)
+        active = total - state_counts.get("stopped", 0)
+
+        stats = {
+            "host": host_info,
+            "vms_total": total,
+            "vms_active": active,
+            "vms_inactive": total - active,
+            "state_distribution": dict(state_counts),
+        }
+        if include_vms:
+            stats["vms"] = all_vms
+        return stats
+
+    def _read_host_info(self, conn: libvirt.virConnect) -> dict:
+        """Infos de l'hôte : 4 RPC, mis en cache HOST_INFO_TTL s (cf. self._host_info)."""
+        node_info = conn.getInfo()
+        # node_info: [model, mem_mb, cpus, mhz, nodes, sockets, cores, threads]
+        return {
+            "hostname": conn.getHostname(),
+            "cpu_model": node_info[0],
+            "memory_total_mb": node_info[1],
+            "cpus": node_info[2],
+            "cpu_frequency_mhz": node_info[3],
+            "libvirt_version": self._format_version(conn.getLibVersion()),
+            "hypervisor_type": conn.getType(),
+        }
 
     @staticmethod
     def _format_version(version_int: int) -> str:
@@ -574,74 +1834,191 @@ class LibvirtManager:
     # ──────────────────────────────────────────
     def list_snapshots(self, name: str) -> list[dict]:
         """Liste les snapshots d'une VM."""
-        conn = self._connect()
-        try:
+        with self._conn() as conn:
             dom = self._get_domain(conn, name)
+            # Tous les objets snapshot en un seul RPC (repli : nom puis lookup)
+            try:
+                snaps = dom.listAllSnapshots(0)
+            except (AttributeError, libvirt.libvirtError):
+                snaps = [dom.snapshotLookupByName(n) for n in dom.snapshotListNames()]
             snapshots = []
-            for snap_name in dom.snapshotListNames():
-                snap = dom.snapshotLookupByName(snap_name)
-                # Récupérer le XML pour avoir la date de création et l'état
-                snap_xml = snap.getXMLDesc()
-                root = ET.fromstring(snap_xml)
-                creation_time = root.find("creationTime")
-                state = root.find("state")
-
+            for snap in snaps:
+                # Date de création et état : lus en flux, en tête du XML, sans
+                # parser la description complète du domaine qui les suit
+                fields = self._xml_fields(snap.getXMLDesc().encode(), _SNAPSHOT_FIELDS)
                 snapshots.append({
-                    "name": snap_name,
-                    "creation_time": int(creation_time.text) if creation_time is not None else 0,
-                    "state": state.text if state is not None else "unknown",
+                    "name": snap.getName(),
+                    "creation_time": int(fields.get("creationTime") or 0),
+                    "state": fields.get("state") or "unknown",
                     "is_current": snap.isCurrent() == 1
                 })
             # Trier par date de création, du plus récent au plus ancien
             return sorted(snapshots, key=lambda x: x["creation_time"], reverse=True)
-        finally:
-            conn.close()
 
     def create_snapshot(self, name: str, snapshot_name: str, description: str = "") -> dict:
         """Crée un snapshot pour une VM."""
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, name)
-            xml = f"<domainsnapshot><name>{snapshot_name}</name><description>{description}</description></domainsnapshot>"
-            dom.snapshotCreateXML(xml, 0)
-            logger.info("Snapshot '%s' créé pour la VM '%s'", snapshot_name, name)
-            return {"status": "created", "name": snapshot_name}
-        except libvirt.libvirtError as e:
-            logger.error("Échec création snapshot '%s' pour VM '%s' : %s", snapshot_name, name, e)
-            raise LibvirtError(f"Impossible de créer le snapshot : {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, name)
+                dom.snapshotCreateXML(self._snapshot_xml(snapshot_name, description), 0)
+                logger.info("Snapshot '%s' créé pour la VM '%s'", snapshot_name, name)
+                return {"status": "created", "name": snapshot_name}
+            except libvirt.libvirtError as e:
+                logger.error("Échec création snapshot '%s' pour VM '%s' : %s", snapshot_name, name, e)
+                raise LibvirtError(f"Impossible de créer le snapshot : {e}")
+
+    @staticmethod
+    def _snapshot_xml(snapshot_name: str, description: str) -> str:
+        """
+        Description XML d'un snapshot, construite par le sérialiseur XML :
+        les caractères spéciaux (<, &...) du nom et de la description sont
+        échappés au lieu de corrompre, voire détourner, le document.
+        """
+        root = ET.Element("domainsnapshot")
+        ET.SubElement(root, "name").text = snapshot_name
+        ET.SubElement(root, "description").text = description
+        return ET.tostring(root, encoding="unicode")
 
     def revert_snapshot(self, vm_name: str, snapshot_name: str) -> dict:
         """Restaure la VM à l'état d'un snapshot."""
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, vm_name)
-            snap = dom.snapshotLookupByName(snapshot_name)
-            # 0 = pas de flag, sinon VIR_DOMAIN_SNAPSHOT_REVERT_FORCE
-            dom.revertToSnapshot(snap, 0)
-            logger.info("VM '%s' restaurée au snapshot '%s'", vm_name, snapshot_name)
-            return {"status": "reverted", "snapshot": snapshot_name}
-        except libvirt.libvirtError as e:
-            logger.error("Échec restauration snapshot '%s' pour VM '%s' : %s", snapshot_name, vm_name, e)
-            raise LibvirtError(f"Impossible de restaurer le snapshot : {e}")
-        finally:
-            conn.close()
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, vm_name)
+                snap = dom.snapshotLookupByName(snapshot_name)
+                # 0 = pas de flag, sinon VIR_DOMAIN_SNAPSHOT_REVERT_FORCE
+                dom.revertToSnapshot(snap, 0)
+                self._invalidate_xml(dom.UUIDString())
+                self._mark_state_dirty()
+                logger.info("VM '%s' restaurée au snapshot '%s'", vm_name, snapshot_name)
+                return {"status": "reverted", "snapshot": snapshot_name}
+            except libvirt.libvirtError as e:
+                logger.error("Échec restauration snapshot '%s' pour VM '%s' : %s", snapshot_name, vm_name, e)
+                raise LibvirtError(f"Impossible de restaurer le snapshot : {e}")
 
     def delete_snapshot(self, vm_name: str, snapshot_name: str) -> dict:
         """Supprime un snapshot."""
-        conn = self._connect()
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, vm_name)
+                snap = dom.snapshotLookupByName(snapshot_name)
+                snap.delete(0)
+                logger.info("Snapshot '%s' supprimé pour la VM '%s'", snapshot_name, vm_name)
+                return {"status": "deleted", "snapshot": snapshot_name}
+            except libvirt.libvirtError as e:
+                logger.error("Échec suppression snapshot '%s' pour VM '%s' : %s", snapshot_name, vm_name, e)
+                raise LibvirtError(f"Impossible de supprimer le snapshot : {e}")
+
+    # ──────────────────────────────────────────
+    # TÂCHES DE FOND
+    # ──────────────────────────────────────────
+    def submit_job(self, kind: str, vm_name: str, fn, *args,
+                   on_done: Callable[[], None] | None = None, **kwargs) -> str:
+        """
+        Lance fn(*args, **kwargs) (delete_snapshot, stop_vm...) dans le pool
+        de tâches et retourne aussitôt son identifiant, à suivre via
+        job_status. Plusieurs tâches s'exécutent en parallèle, bornées par
+        JOB_WORKERS. `on_done` est appelé à la fin de la tâche, réussie ou
+        non (ex. vider un cache de réponses côté API).
+        """
+        job_id = uuid4().hex
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "vm": vm_name,
+            "status": "pending",
+            "submitted_at": time.time(),
+            "result": None,
+            "error": None,
+        }
+        with self._jobs_lock:
+            if len(self._jobs) >= JOB_HISTORY:
+                # Seules les tâches terminées sont oubliées, jamais celles en cours
+                finished = [jid for jid, j in self._jobs.items()
+                            if j["status"] in ("done", "failed")]
+                for jid in finished[:len(self._jobs) - JOB_HISTORY + 1]:
+                    del self._jobs[jid]
+                if len(self._jobs) >= JOB_HISTORY:
+                    raise JobQueueFullError(
+                        f"{JOB_HISTORY} tâches déjà en attente ou en cours"
+                    )
+            self._jobs[job_id] = job
+
+        def run() -> None:
+            with self._jobs_lock:
+                job["status"] = "running"
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                logger.error("Tâche %s (%s sur '%s') échouée : %s", job_id, kind, vm_name, e)
+                with self._jobs_lock:
+                    job["error"] = str(e)
+                    job["status"] = "failed"
+            else:
+                with self._jobs_lock:
+                    job["result"] = result
+                    job["status"] = "done"
+            if on_done is not None:
+                try:
+                    on_done()
+                except Exception:
+                    logger.exception("Rappel de fin de la tâche %s échoué", job_id)
+
+        self._job_pool.submit(run)
+        return job_id
+
+    def delete_snapshot_async(self, vm_name: str, snapshot_name: str,
+                              on_done: Callable[[], None] | None = None) -> str:
+        """delete_snapshot en tâche de fond ; retourne l'identifiant de tâche."""
+        return self.submit_job("delete_snapshot", vm_name, self.delete_snapshot,
+                               vm_name, snapshot_name, on_done=on_done)
+
+    def revert_snapshot_async(self, vm_name: str, snapshot_name: str,
+                              on_done: Callable[[], None] | None = None) -> str:
+        """revert_snapshot en tâche de fond ; retourne l'identifiant de tâche."""
+        return self.submit_job("revert_snapshot", vm_name, self.revert_snapshot,
+                               vm_name, snapshot_name, on_done=on_done)
+
+    def stop_vm_async(self, name: str, force: bool = False,
+                      on_done: Callable[[], None] | None = None) -> str:
+        """stop_vm en tâche de fond ; retourne l'identifiant de tâche."""
+        return self.submit_job("stop_vm", name, self.stop_vm, name, force=force, on_done=on_done)
+
+    def job_status(self, job_id: str) -> dict:
+        """
+        État d'une tâche (pending, running, done, failed) et son résultat.
+        Pendant l'exécution, la progression du job libvirt (dom.jobInfo())
+        est jointe quand l'hyperviseur en rapporte une.
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            status = dict(job) if job is not None else None
+        if status is None:
+            raise JobNotFoundError(f"Tâche '{job_id}' introuvable")
+
+        if status["status"] == "running":
+            status["progress"] = self._job_progress(status["vm"])
+        return status
+
+    def _job_progress(self, vm_name: str) -> dict | None:
+        """Progression du job libvirt en cours sur la VM, None s'il n'y en a pas."""
         try:
-            dom = self._get_domain(conn, vm_name)
-            snap = dom.snapshotLookupByName(snapshot_name)
-            snap.delete(0)
-            logger.info("Snapshot '%s' supprimé pour la VM '%s'", snapshot_name, vm_name)
-            return {"status": "deleted", "snapshot": snapshot_name}
+            with self._conn() as conn:
+                info = self._get_domain(conn, vm_name).jobInfo()
+        except LibvirtError:
+            return None
         except libvirt.libvirtError as e:
-            logger.error("Échec suppression snapshot '%s' pour VM '%s' : %s", snapshot_name, vm_name, e)
-            raise LibvirtError(f"Impossible de supprimer le snapshot : {e}")
-        finally:
-            conn.close()
+            logger.debug("jobInfo indisponible pour '%s' : %s", vm_name, e)
+            return None
+        # info: [type, elapsed_ms, remaining_ms, data_total, data_processed, data_remaining, ...]
+        if info[0] == libvirt.VIR_DOMAIN_JOB_NONE:
+            return None
+        return {
+            "elapsed_ms": info[1],
+            "remaining_ms": info[2],
+            "data_total": info[3],
+            "data_processed": info[4],
+            "data_remaining": info[5],
+        }
 
     # ──────────────────────────────────────────
     # RESSOURCES (CPU / RAM)
@@ -651,37 +2028,37 @@ class LibvirtManager:
         Modifie les ressources allouées (vCPU, RAM).
         Note: Modifie la configuration persistante (prochain boot).
         """
-        conn = self._connect()
-        try:
-            dom = self._get_domain(conn, name)
-            # Convertir MB en KiB
-            memory_kib = memory_mb * 1024
+        with self._conn() as conn:
+            try:
+                dom = self._get_domain(conn, name)
+                # Convertir MB en KiB
+                memory_kib = memory_mb * 1024
 
-            # Application sur la config persistante (VIR_DOMAIN_AFFECT_CONFIG = 2)
-            flags = libvirt.VIR_DOMAIN_AFFECT_CONFIG
+                # Application sur la config persistante (VIR_DOMAIN_AFFECT_CONFIG = 2)
+                flags = libvirt.VIR_DOMAIN_AFFECT_CONFIG
 
-            # Si la VM est éteinte, on peut appliquer sur CURRENT (qui est égal à CONFIG)
-            if not dom.isActive():
-                flags = libvirt.VIR_DOMAIN_AFFECT_CURRENT
+                # Si la VM est éteinte, on peut appliquer sur CURRENT (qui est égal à CONFIG)
+                if not dom.isActive():
+                    flags = libvirt.VIR_DOMAIN_AFFECT_CURRENT
 
-            # Mise à jour de la mémoire
-            dom.setMaxMemory(memory_kib)  # Change la limite max
-            dom.setMemoryFlags(memory_kib, flags) # Change l'allocation courante
+                # Mise à jour de la mémoire
+                dom.setMaxMemory(memory_kib)  # Change la limite max
+                dom.setMemoryFlags(memory_kib, flags) # Change l'allocation courante
 
-            # Mise à jour des vCPUs
-            # setVcpusFlags avec AFFECT_CONFIG modifie le nombre de vCPUs au démarrage
-            dom.setVcpusFlags(vcpus, flags)
+                # Mise à jour des vCPUs
+                # setVcpusFlags avec AFFECT_CONFIG modifie le nombre de vCPUs au démarrage
+                dom.setVcpusFlags(vcpus, flags)
+                self._invalidate_xml(dom.UUIDString())
+                self._mark_state_dirty()
 
-            logger.info("Ressources mises à jour pour VM '%s' : %d vCPU, %d MB", name, vcpus, memory_mb)
+                logger.info("Ressources mises à jour pour VM '%s' : %d vCPU, %d MB", name, vcpus, memory_mb)
 
-            restart_needed = dom.isActive()
-            return {
-                "status": "updated",
-                "restart_needed": restart_needed,
-                "message": "Modifications appliquées au prochain redémarrage." if restart_needed else "Modifications appliquées."
-            }
-        except libvirt.libvirtError as e:
-            logger.error("Échec maj ressources VM '%s' : %s", name, e)
-            raise LibvirtError(f"Impossible de modifier les ressources : {e}")
-        finally:
-            conn.close()
+                restart_needed = dom.isActive()
+                return {
+                    "status": "updated",
+                    "restart_needed": restart_needed,
+                    "message": "Modifications appliquées au prochain redémarrage." if restart_needed else "Modifications appliquées."
+                }
+            except libvirt.libvirtError as e:
+                logger.error("Échec maj ressources VM '%s' : %s", name, e)
+                raise LibvirtError(f"Impossible de modifier les ressources : {e}")